@@ -0,0 +1,114 @@
+"""Офлайн-бенчмарк обработки вакансий по записи ответов hh.ru
+
+Запись делается ботом с HH_CAPTURE_MODE=record. Пример запуска:
+
+    python benchmark.py hh_capture.jsonl.gz --rounds 20 --scale 10
+    python benchmark.py hh_capture.jsonl.gz --codecs
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+import json_codec
+from config import Config
+from hh_capture import CaptureReplayer
+from json_codec import available_codecs
+from vacancy_parser import VacancyParser
+
+
+class StageTimer:
+    """Суммарное время по этапам обработки"""
+
+    def __init__(self):
+        self.totals: Dict[str, float] = {}
+
+    def measure(self, stage: str, func, *args):
+        """Вызов функции с замером времени"""
+        started = time.perf_counter()
+        result = func(*args)
+        self.totals[stage] = self.totals.get(stage, 0.0) + time.perf_counter() - started
+        return result
+
+
+def build_config(capture_file: Path, state_dir: Path, speed: float, scale: int) -> Config:
+    """Конфигурация с воспроизведением записи и временными файлами состояния"""
+    config = Config()
+    config.capture_mode = 'replay'
+    config.HH_CAPTURE_FILE = capture_file
+    config.replay_speed = speed
+    config.replay_scale = scale
+    config.SEEN_VACANCIES_FILE = state_dir / "seen_vacancies.json"
+    config.SEEN_INDEX_FILE = state_dir / "seen_vacancies.idx"
+    config.SEEN_DELTA_FILE = state_dir / "seen_vacancies.delta"
+    config.DEDUP_FILE = state_dir / "vacancy_fingerprints.json"
+    config.STATS_FILE = state_dir / "vacancy_stats.json"
+    return config
+
+
+def run(capture_file: Path, rounds: int, speed: float, scale: int, filters: Dict):
+    """Прогон цикла парсера по записи"""
+    with tempfile.TemporaryDirectory() as state_dir:
+        config = build_config(capture_file, Path(state_dir), speed, scale)
+        json_codec.configure(config)
+        parser = VacancyParser(config)
+        timer = StageTimer()
+        fetched = 0
+        sent: List[str] = []
+
+        for _ in range(rounds):
+            vacancies = timer.measure('fetch', parser.fetch_vacancies, filters)
+            fetched += len(vacancies)
+            new_vacancies = timer.measure(
+                'filter', parser.filter_new_vacancies, vacancies, filters
+            )
+            ranked, _, _ = timer.measure('rank', parser.rank_vacancies, new_vacancies, [filters])[0]
+            for vacancy in ranked:
+                sent.append(timer.measure('format', parser.format_vacancy, vacancy))
+
+        print(f"Циклов: {rounds}, получено: {fetched}, к отправке: {len(sent)}")
+        for stage, total in timer.totals.items():
+            print(f"{stage:>8}: {total * 1000:9.2f} мс всего, {total / rounds * 1000:8.3f} мс/цикл")
+
+
+def run_codecs(capture_file: Path, rounds: int, scale: int):
+    """Сравнение стоимости разбора ответов hh.ru разными JSON-бэкендами"""
+    replayer = CaptureReplayer(capture_file, speed=0, scale=scale)
+    bodies = [replayer.get('', entry['params']).content for entry in replayer.entries]
+    total_bytes = sum(len(body) for body in bodies) * rounds
+
+    print(f"Ответов: {len(bodies)}, объём: {total_bytes / 1024 / 1024:.1f} МБ за {rounds} циклов")
+    for codec in available_codecs():
+        started = time.perf_counter()
+        items = 0
+        for _ in range(rounds):
+            for body in bodies:
+                items += len(codec.decode_vacancies(body))
+        elapsed = time.perf_counter() - started
+        print(
+            f"{codec.name:>8}: {elapsed * 1000:9.2f} мс всего, "
+            f"{elapsed / max(items, 1) * 1e6:7.2f} мкс/вакансия"
+        )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('capture', type=Path, help="файл записи hh_capture.jsonl.gz")
+    arg_parser.add_argument('--rounds', type=int, default=10, help="число циклов парсера")
+    arg_parser.add_argument('--speed', type=float, default=0.0,
+                            help="ускорение записанных задержек (0 — без задержек)")
+    arg_parser.add_argument('--scale', type=int, default=1, help="множитель числа вакансий")
+    arg_parser.add_argument('--position', default="Python разработчик", help="поисковый запрос")
+    arg_parser.add_argument('--codecs', action='store_true',
+                            help="сравнить JSON-бэкенды на разборе ответов")
+    args = arg_parser.parse_args()
+
+    if args.codecs:
+        run_codecs(args.capture, args.rounds, args.scale)
+        return
+
+    run(args.capture, args.rounds, args.speed, args.scale, {'position': args.position})
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 import asyncio
 import logging
-from typing import Optional
+import time
+from typing import Dict, List, Optional
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.client.default import DefaultBotProperties  # ← Добавить импорт
 
+from checkpoint import SchedulerCheckpoint
 from config import Config
 from filters_manager import FiltersManager
 from vacancy_parser import VacancyParser
@@ -16,6 +18,8 @@ logger = logging.getLogger(__name__)
 class VacancyBot:
     """Основной класс Telegram-бота"""
 
+    PARSER_JOB = 'parser'
+
     def __init__(self, config: Config):
         self.config = config
 
@@ -34,6 +38,11 @@ class VacancyBot:
         self.handlers = BotHandlers(self)
         self.dp.include_router(self.handlers.router)
         self.parser_task: Optional[asyncio.Task] = None
+        self.checkpoint = SchedulerCheckpoint(config)
+        self._draining = asyncio.Event()
+        self._next_run_at: Optional[float] = None
+        self._pending: List[Dict] = []
+        self._pending_chat_id: Optional[int] = None
 
         logger.info("Бот инициализирован")
 
@@ -42,6 +51,7 @@ class VacancyBot:
         self.filters_manager.set('enabled', True)
 
         if not self.parser_task or self.parser_task.done():
+            self._draining.clear()
             self.parser_task = asyncio.create_task(self._run_parser())
             logger.info("Парсер запущен")
 
@@ -57,58 +67,188 @@ class VacancyBot:
                 pass
             logger.info("Парсер остановлен")
 
+        # Пользователь остановил парсер сам — продолжать с прежнего места
+        # не нужно. Отложенные вакансии остаются: их ID уже просмотрены
+        self._pending = []
+        self._next_run_at = None
+        self.checkpoint.pop_job(self.PARSER_JOB)
+
+    async def drain(self):
+        """Плавная остановка парсера с сохранением контрольной точки
+
+        Новые циклы не начинаются, текущая отправка получает
+        DRAIN_TIMEOUT_SECONDS на завершение. Флаг enabled не меняется,
+        поэтому после перезапуска парсер продолжит с контрольной точки.
+        """
+        self._draining.set()
+
+        if self.parser_task and not self.parser_task.done():
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(self.parser_task),
+                    self.config.DRAIN_TIMEOUT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "Отправка не завершилась за %s с, осталось %s вакансий",
+                    self.config.DRAIN_TIMEOUT_SECONDS, len(self._pending)
+                )
+                self.parser_task.cancel()
+                try:
+                    await self.parser_task
+                except asyncio.CancelledError:
+                    pass
+
+        if self.filters_manager.get('enabled'):
+            self.checkpoint.set_job(
+                self.PARSER_JOB,
+                self._next_run_at,
+                {
+                    'chat_id': self._pending_chat_id,
+                    'pending': self._pending,
+                }
+            )
+            logger.info("Контрольная точка парсера сохранена")
+
+    async def _wait_draining(self, timeout: float) -> bool:
+        """Ожидание с прерыванием при остановке; True, если началась остановка"""
+        try:
+            await asyncio.wait_for(self._draining.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _resume_from_checkpoint(self):
+        """Восстановление расписания и недоотправленных вакансий"""
+        job = self.checkpoint.pop_job(self.PARSER_JOB)
+        if not job:
+            return
+
+        self._next_run_at = job.get('next_run_at')
+        cursor = job.get('cursor') or {}
+        if cursor.get('backlog') and not self.parser.backlog.vacancies:
+            # Контрольная точка прежней версии хранила отложенные вакансии у себя
+            self.parser.backlog.update(cursor['backlog'], cursor.get('rank_attempts') or {})
+        pending = cursor.get('pending') or []
+        if pending and cursor.get('chat_id'):
+            logger.info("Досылка %s вакансий из контрольной точки", len(pending))
+            await self._send_vacancies(cursor['chat_id'], pending)
+
     async def _run_parser(self):
         """Основной цикл парсера"""
         logger.info("Парсер начал работу")
 
-        while self.filters_manager.get('enabled'):
+        try:
+            await self._resume_from_checkpoint()
+        except asyncio.CancelledError:
+            logger.info("Парсер остановлен по запросу")
+            return
+
+        while self.filters_manager.get('enabled') and not self._draining.is_set():
             try:
-                await self._check_and_send_vacancies()
+                delay = (self._next_run_at or 0) - time.time()
+                if delay > 0:
+                    logger.info("Следующая проверка через %.0f с", delay)
+                    if await self._wait_draining(delay):
+                        break
+
+                # Время следующего запуска известно до начала цикла, чтобы
+                # прерванный при остановке цикл не повторялся сразу после старта
                 interval = self.filters_manager.get('interval_minutes', 15)
-                interval_seconds = interval * 60
-                logger.info(f"Следующая проверка через {interval} минут")
-                await asyncio.sleep(interval_seconds)
+                self._next_run_at = time.time() + interval * 60
+                await self._check_and_send_vacancies()
             except asyncio.CancelledError:
                 logger.info("Парсер остановлен по запросу")
                 break
             except Exception as e:
-                logger.error(f"Ошибка в парсере: {e}", exc_info=True)
-                await asyncio.sleep(60)
+                logger.error("Ошибка в парсере: %s", e, exc_info=True)
+                self._next_run_at = time.time() + 60
         logger.info("Парсер завершил работу")
 
     async def _check_and_send_vacancies(self):
         """Проверка и отправка новых вакансий"""
         logger.info("Проверка новых вакансий...")
         filters = self.filters_manager.filters
-        vacancies = await asyncio.to_thread(
-            self.parser.fetch_vacancies,
-            filters
+        subscriptions = [filters]
+        fetched = await asyncio.to_thread(
+            self.parser.fetch_for_subscriptions,
+            subscriptions
         )
+        vacancies = fetched[0]
 
-        if not vacancies:
+        if vacancies:
+            new_vacancies = self.parser.filter_new_vacancies(vacancies, filters)
+        else:
             logger.info("Вакансии не получены")
-            return
-        new_vacancies = self.parser.filter_new_vacancies(vacancies)
-        if not new_vacancies:
+            new_vacancies = []
+
+        # Вакансии, не попавшие в top_k прошлых циклов, ранжируются вместе
+        # с новыми: их ID уже отмечены просмотренными, иначе они бы пропали
+        backlog = self.parser.backlog
+        candidates = backlog.vacancies + new_vacancies
+        if not candidates:
             logger.info("Новых вакансий нет")
             return
         chat_id = filters.get('chat_id')
         if not chat_id:
-            logger.warning("chat_id не установлен, вакансии не отправлены")
+            logger.warning("chat_id не установлен, вакансии отложены")
+            backlog.update(candidates[:self.config.RELEVANCE_BACKLOG_LIMIT], backlog.rank_attempts)
+            return
+
+        new_vacancies, overflow, rejected = self.parser.rank_vacancies(candidates, subscriptions)[0]
+        self._update_backlog(overflow, rejected)
+        if not new_vacancies:
+            logger.info("Релевантных вакансий нет")
             return
 
-        logger.info(f"Отправка {len(new_vacancies)} новых вакансий")
+        logger.info("Отправка %s новых вакансий", len(new_vacancies))
+        await self._send_vacancies(chat_id, new_vacancies)
+        logger.info("Отправлено %s вакансий", len(new_vacancies))
 
-        for vacancy in new_vacancies:
+    def _update_backlog(self, overflow: List[Dict], rejected: List[Dict]):
+        """Сохранение неотправленных вакансий до следующей проверки
+
+        Не попавшие в top_k ждут своей очереди без ограничения числа
+        циклов. Оценка ниже порога зависит от состава пачки (IDF), поэтому
+        такие вакансии переоцениваются ещё RELEVANCE_RETRY_CYCLES раз.
+        Очередь сохраняется на диск сразу.
+        """
+        backlog = self.parser.backlog
+        attempts = {}
+        retry = []
+        for vacancy in rejected:
+            vacancy_id = str(vacancy.get('id'))
+            count = backlog.rank_attempts.get(vacancy_id, 0) + 1
+            if count < self.config.RELEVANCE_RETRY_CYCLES:
+                attempts[vacancy_id] = count
+                retry.append(vacancy)
+
+        kept = (overflow + retry)[:self.config.RELEVANCE_BACKLOG_LIMIT]
+        kept_ids = {str(v.get('id')) for v in kept}
+        backlog.update(kept, {
+            vacancy_id: count for vacancy_id, count in attempts.items()
+            if vacancy_id in kept_ids
+        })
+        if kept:
+            logger.info("Отложено до следующей проверки: %s вакансий", len(kept))
+
+    async def _send_vacancies(self, chat_id: int, vacancies: List[Dict]):
+        """Отправка вакансий с учётом курсора для контрольной точки"""
+        # Неотправленный остаток пачки попадёт в контрольную точку,
+        # если отправку прервут по таймауту остановки
+        self._pending = list(vacancies)
+        self._pending_chat_id = chat_id
+
+        while self._pending:
+            vacancy = self._pending[0]
             try:
                 message = self.parser.format_vacancy(vacancy)
                 await self.bot.send_message(chat_id, message)
-                await asyncio.sleep(self.config.MESSAGE_DELAY_SECONDS)
-
             except Exception as e:
-                logger.error(f"Ошибка отправки вакансии: {e}")
-
-        logger.info(f"Отправлено {len(new_vacancies)} вакансий")
+                logger.error("Ошибка отправки вакансии: %s", e)
+            self._pending.pop(0)
+            if self._pending:
+                await asyncio.sleep(self.config.MESSAGE_DELAY_SECONDS)
 
     async def start(self):
         """Запуск бота"""
@@ -119,7 +259,7 @@ class VacancyBot:
             await self.dp.start_polling(self.bot)
 
         except Exception as e:
-            logger.error(f"Критическая ошибка при запуске бота: {e}", exc_info=True)
+            logger.error("Критическая ошибка при запуске бота: %s", e, exc_info=True)
             raise
         finally:
             await self.shutdown()
@@ -127,6 +267,6 @@ class VacancyBot:
     async def shutdown(self):
         """Корректное завершение работы бота"""
         logger.info("Остановка бота...")
-        await self.stop_parser()
+        await self.drain()
         await self.bot.session.close()
         logger.info("Бот остановлен")
\ No newline at end of file
@@ -0,0 +1,50 @@
+import logging
+from typing import Dict, Optional
+from config import Config
+from json_codec import codec
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerCheckpoint:
+    """Контрольная точка фоновых задач для тёплого перезапуска
+
+    Для каждой задачи хранится время следующего запуска и курсор —
+    данные, которые нужны, чтобы продолжить работу с места остановки.
+    """
+
+    def __init__(self, config: Config):
+        self.checkpoint_file = config.CHECKPOINT_FILE
+        self._jobs: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        """Загрузка контрольной точки"""
+        try:
+            if self.checkpoint_file.exists():
+                with open(self.checkpoint_file, 'rb') as f:
+                    data = codec.loads(f.read())
+                    logger.info("Загружена контрольная точка задач: %s", ', '.join(data) or '—')
+                    return data
+        except Exception as e:
+            logger.error("Ошибка загрузки контрольной точки: %s", e)
+        return {}
+
+    def save(self):
+        """Сохранение контрольной точки"""
+        try:
+            with open(self.checkpoint_file, 'wb') as f:
+                f.write(codec.dumps(self._jobs))
+        except Exception as e:
+            logger.error("Ошибка сохранения контрольной точки: %s", e)
+
+    def set_job(self, name: str, next_run_at: Optional[float], cursor: Dict):
+        """Запись состояния задачи"""
+        self._jobs[name] = {'next_run_at': next_run_at, 'cursor': cursor}
+        self.save()
+
+    def pop_job(self, name: str) -> Optional[Dict]:
+        """Получение состояния задачи с удалением из контрольной точки"""
+        job = self._jobs.pop(name, None)
+        if job is not None:
+            self.save()
+        return job
@@ -1,6 +1,7 @@
 import os
 import logging
 from pathlib import Path
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
@@ -10,23 +11,54 @@ class Config:
     BASE_DIR = Path(__file__).parent
     FILTERS_FILE = BASE_DIR / "filters.json"
     SEEN_VACANCIES_FILE = BASE_DIR / "seen_vacancies.json"
+    SEEN_INDEX_FILE = BASE_DIR / "seen_vacancies.idx"
+    SEEN_DELTA_FILE = BASE_DIR / "seen_vacancies.delta"
+    SEEN_DELTA_MERGE_THRESHOLD = 5000
+    BACKLOG_FILE = BASE_DIR / "vacancy_backlog.json"
+    DEDUP_FILE = BASE_DIR / "vacancy_fingerprints.json"
+    DEDUP_TTL_DAYS = 30
+    DEDUP_MIN_JACCARD = 0.6
+    DEDUP_SALARY_TOLERANCE = 0.2
+    STATS_FILE = BASE_DIR / "vacancy_stats.json"
+    STATS_HISTORY_DAYS = 30
+    STATS_DIGEST_COMPRESSION = 100
+    CHECKPOINT_FILE = BASE_DIR / "scheduler_checkpoint.json"
+    DRAIN_TIMEOUT_SECONDS = 30
     HH_API_URL = "https://api.hh.ru/vacancies"
     HH_API_TIMEOUT = 10
+    HH_CAPTURE_FILE = BASE_DIR / "hh_capture.jsonl.gz"
     MIN_INTERVAL_MINUTES = 5
     DEFAULT_INTERVAL_MINUTES = 15
     MAX_VACANCIES_PER_PAGE = 50
+    MERGED_QUERY_MAX_PAGES = 5
     MESSAGE_DELAY_SECONDS = 1
+    RENDER_CACHE_SIZE = 1000
+    RELEVANCE_MIN_SCORE = 0.05
+    RELEVANCE_TOP_K = 20
+    RELEVANCE_BACKLOG_LIMIT = 200
+    RELEVANCE_RETRY_CYCLES = 3
+    PERF_WINDOW_SIZE = 500
+    PERF_BLOCK_THRESHOLD_MS = 100
+    LOG_LEVEL = logging.INFO
+    LOG_RATE_LIMIT_SECONDS = 60
+    LOG_RATE_LIMIT_BURST = 3
 
     def __init__(self):
         """Инициализация конфигурации"""
         self.bot_token = self._get_bot_token()
+        self.admin_id = self._get_admin_id()
+        self.log_json = (self._get_env('LOG_FORMAT') or '').lower() == 'json'
+        self.capture_mode = (self._get_env('HH_CAPTURE_MODE') or '').lower() or None
+        self.replay_speed = self._get_number('HH_REPLAY_SPEED', float, 1.0)
+        self.replay_scale = self._get_number('HH_REPLAY_SCALE', int, 1)
+        self.json_codec = (self._get_env('JSON_CODEC') or '').lower() or None
 
-    def _get_bot_token(self) -> str:
-        """Получение токена бота из переменных окружения или файла"""
-        token = os.getenv('TELEGRAM_BOT_TOKEN')
+    def _get_env(self, key: str) -> Optional[str]:
+        """Получение значения из переменных окружения или файла .env"""
+        value = os.getenv(key)
 
-        if token:
-            return token
+        if value:
+            return value
 
         env_file = self.BASE_DIR / '.env'
         if env_file.exists():
@@ -34,12 +66,34 @@ class Config:
                 with open(env_file, 'r', encoding='utf-8') as f:
                     for line in f:
                         line = line.strip()
-                        if line.startswith('TELEGRAM_BOT_TOKEN='):
+                        if line.startswith(f'{key}='):
                             return line.split('=', 1)[1].strip()
             except Exception as e:
                 logger.error(f"Ошибка чтения .env файла: {e}")
 
-        return "YOUR_BOT_TOKEN_HERE"
+        return None
+
+    def _get_bot_token(self) -> str:
+        """Получение токена бота из переменных окружения или файла"""
+        return self._get_env('TELEGRAM_BOT_TOKEN') or "YOUR_BOT_TOKEN_HERE"
+
+    def _get_admin_id(self) -> Optional[int]:
+        """Получение ID администратора (TELEGRAM_ADMIN_ID)"""
+        value = self._get_env('TELEGRAM_ADMIN_ID')
+        try:
+            return int(value) if value else None
+        except ValueError:
+            logger.error(f"Некорректный TELEGRAM_ADMIN_ID: {value}")
+            return None
+
+    def _get_number(self, key: str, cast, default):
+        """Числовой параметр из окружения со значением по умолчанию"""
+        value = self._get_env(key)
+        try:
+            return cast(value) if value else default
+        except ValueError:
+            logger.error(f"Некорректный {key}: {value}")
+            return default
 
     def validate(self) -> bool:
         """Валидация конфигурации"""
@@ -59,6 +113,15 @@ class Config:
         """Создание шаблона .env файла"""
         env_template = """# Telegram Bot Configuration
 TELEGRAM_BOT_TOKEN=your_bot_token_here
+# ID администратора для служебных команд (/perf), необязательно
+# TELEGRAM_ADMIN_ID=123456789
+# Формат логов: text (по умолчанию) или json
+# LOG_FORMAT=json
+
+# Запись ответов hh.ru (record) или работа по записи без сети (replay)
+# HH_CAPTURE_MODE=record
+# HH_REPLAY_SPEED=1.0
+# HH_REPLAY_SCALE=1
 
 # Получить токен можно у @BotFather в Telegram
 # 1. Напишите @BotFather
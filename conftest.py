@@ -0,0 +1 @@
+# Корень репозитория добавляется в sys.path, чтобы тесты импортировали модули бота
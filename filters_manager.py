@@ -1,8 +1,8 @@
-import json
 import logging
 from pathlib import Path
 from typing import Dict
 from config import Config, DefaultFilters
+from json_codec import codec, JsonDecodeError
 
 logger = logging.getLogger(__name__)
 
@@ -25,14 +25,14 @@ class FiltersManager:
         """Загрузка фильтров из JSON"""
         try:
             if self.filters_file.exists():
-                with open(self.filters_file, 'r', encoding='utf-8') as f:
-                    loaded_filters = json.load(f)
+                with open(self.filters_file, 'rb') as f:
+                    loaded_filters = codec.loads(f.read())
                     logger.info("Фильтры загружены из файла")
                     return loaded_filters
             else:
                 logger.info("Файл фильтров не найден, создаем новый")
                 return self.create_default()
-        except json.JSONDecodeError as e:
+        except JsonDecodeError as e:
             logger.error(f"Ошибка парсинга JSON: {e}")
             return self.create_default()
         except Exception as e:
@@ -52,8 +52,8 @@ class FiltersManager:
             filters = self._filters
 
         try:
-            with open(self.filters_file, 'w', encoding='utf-8') as f:
-                json.dump(filters, f, ensure_ascii=False, indent=2)
+            with open(self.filters_file, 'wb') as f:
+                f.write(codec.dumps(filters, pretty=True))
             self._filters = filters
             logger.info("Фильтры успешно сохранены")
         except Exception as e:
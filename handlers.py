@@ -1,9 +1,11 @@
+import html
 import logging
 from aiogram import Router, F
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from middlewares import LatencyTracker, UpdateLatencyMiddleware, HandlerLatencyMiddleware
 
 logger = logging.getLogger(__name__)
 
@@ -21,15 +23,37 @@ class BotHandlers:
     def __init__(self, bot_instance):
         self.bot = bot_instance
         self.router = Router()
+        self.latency = LatencyTracker(bot_instance.config)
+        self._register_middlewares()
         self._register_handlers()
 
+    def _register_middlewares(self):
+        """Регистрация middleware замера задержек"""
+        for event_name in ("message", "callback_query"):
+            observer = self.router.observers[event_name]
+            observer.outer_middleware(UpdateLatencyMiddleware(self.latency, event_name))
+            observer.middleware(HandlerLatencyMiddleware(self.latency))
+
+    def _is_admin(self, chat_id: int) -> bool:
+        """Проверка прав администратора
+
+        Если TELEGRAM_ADMIN_ID не задан, администратором считается
+        владелец бота (чат, из которого вызван /start).
+        """
+        admin_id = self.bot.config.admin_id
+        if admin_id is None:
+            admin_id = self.bot.filters_manager.get('chat_id')
+        return admin_id is not None and chat_id == admin_id
+
     def _register_handlers(self):
         """Регистрация всех обработчиков"""
         self.router.message(Command("start"))(self.cmd_start)
         self.router.message(Command("menu"))(self.cmd_menu)
         self.router.message(Command("status"))(self.cmd_status)
+        self.router.message(Command("stats"))(self.cmd_stats)
         self.router.message(Command("help"))(self.cmd_help)
         self.router.message(Command("reset"))(self.cmd_reset)
+        self.router.message(Command("perf"))(self.cmd_perf)
 
         self.router.callback_query(F.data == "set_position")(self.set_position_callback)
         self.router.callback_query(F.data == "set_salary")(self.set_salary_callback)
@@ -81,6 +105,34 @@ class BotHandlers:
             f"Просмотрено вакансий: {stats['seen_count']}"
         )
 
+    async def cmd_stats(self, message: Message):
+        """Обработчик команды /stats"""
+        filters = self.bot.filters_manager.filters
+        position = filters.get('position', '')
+        stats = self.bot.parser.get_query_stats(filters) if position else None
+
+        if not stats:
+            await message.answer(
+                "<b>Статистика пока не собрана</b>\n\n"
+                "Она появится после первых найденных вакансий."
+            )
+            return
+
+        def fmt(value):
+            return f"{value:,.0f}" if value is not None else "—"
+
+        await message.answer(
+            f"<b>Статистика по запросу</b> {html.escape(position)}\n\n"
+            f"Всего новых вакансий: {stats['total']}\n"
+            f"Сегодня: {stats['today']}\n"
+            f"В среднем за {stats['days']} дн.: {stats['per_day']:.1f} в день\n\n"
+            f"<b>Зарплата</b> (по {stats['with_salary']} вакансиям, руб.)\n"
+            f"25%: {fmt(stats['p25'])}\n"
+            f"Медиана: {fmt(stats['p50'])}\n"
+            f"75%: {fmt(stats['p75'])}\n"
+            f"90%: {fmt(stats['p90'])}"
+        )
+
     async def cmd_help(self, message: Message):
         """Обработчик команды /help"""
         
@@ -91,6 +143,7 @@ class BotHandlers:
 /start - Начать работу с ботом
 /menu - Открыть меню настроек
 /status - Показать текущий статус
+/stats - Статистика рынка по запросу
 /reset - Сбросить все настройки
 /help - Показать эту справку
 
@@ -121,6 +174,29 @@ class BotHandlers:
             reply_markup=self.bot.keyboard.get_menu_keyboard()
         )
 
+    async def cmd_perf(self, message: Message):
+        """Обработчик команды /perf (только для администратора)"""
+        if not self._is_admin(message.chat.id):
+            return
+
+        report = self.latency.get_report()
+        if not report:
+            await message.answer("<b>Замеров пока нет</b>")
+            return
+
+        lines = [
+            f"{item['name']}: p50 {item['p50'] * 1000:.1f} мс, "
+            f"p99 {item['p99'] * 1000:.1f} мс, n={item['count']}"
+            + (f", блокировок: {item['blocking']}" if item['blocking'] else "")
+            for item in report
+        ]
+        threshold = self.bot.config.PERF_BLOCK_THRESHOLD_MS
+        await message.answer(
+            "<b>Задержки обработчиков</b>\n\n"
+            + "\n".join(lines)
+            + f"\n\nПорог блокировки event loop: {threshold} мс"
+        )
+
     async def set_position_callback(self, callback: CallbackQuery, state: FSMContext):
         """Начало установки должности"""
         await callback.message.answer(
@@ -0,0 +1,173 @@
+import gzip
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import requests
+from json_codec import codec
+
+logger = logging.getLogger(__name__)
+
+
+def _params_key(params: Dict) -> str:
+    """Канонический ключ параметров запроса"""
+    return json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class CaptureRecorder:
+    """Запись запросов к hh.ru и ответов в сжатый JSONL-файл
+
+    Каждая запись дописывается отдельным gzip-фрагментом, поэтому файл
+    остаётся читаемым даже после аварийного завершения.
+    """
+
+    def __init__(self, capture_file: Path):
+        self.capture_file = capture_file
+        self._lock = threading.Lock()
+
+    def record(self, url: str, params: Dict, status: int, elapsed: float, body: bytes):
+        """Сохранение одного запроса и ответа"""
+        entry = {
+            'ts': time.time(),
+            'url': url,
+            'params': params,
+            'status': status,
+            'elapsed': elapsed,
+            'body': body.decode('utf-8', errors='replace'),
+        }
+        line = codec.dumps(entry) + b'\n'
+        try:
+            with self._lock, gzip.open(self.capture_file, 'ab') as f:
+                f.write(line)
+        except Exception as e:
+            logger.error("Ошибка записи ответа hh.ru: %s", e)
+
+
+class ReplayResponse:
+    """Ответ из записи с интерфейсом requests.Response"""
+
+    def __init__(self, url: str, status_code: int, content: bytes, elapsed: float):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.elapsed_seconds = elapsed
+
+    def json(self):
+        """Разбор тела ответа"""
+        return codec.loads(self.content)
+
+    def raise_for_status(self):
+        """Исключение для ответов с ошибкой, как в requests"""
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Error (replay) for url: {self.url}"
+            )
+
+
+class CaptureReplayer:
+    """Воспроизведение записанных ответов hh.ru
+
+    Ответ подбирается по совпадению параметров запроса, а если такого
+    нет — берётся следующий по порядку. speed ускоряет воспроизведение
+    записанных задержек (0 — без задержек), scale размножает вакансии
+    в ответе с синтетическими ID для нагрузочных прогонов. Когда записи
+    заканчиваются и воспроизведение идёт по кругу, ID вакансий меняются,
+    так что каждый цикл бенчмарка обрабатывает новые вакансии.
+    """
+
+    def __init__(self, capture_file: Path, speed: float = 1.0, scale: int = 1):
+        self.capture_file = capture_file
+        self.speed = speed
+        self.scale = max(1, scale)
+        self._entries: List[Dict] = self._load()
+        self._by_params: Dict[str, List[Dict]] = {}
+        for entry in self._entries:
+            self._by_params.setdefault(_params_key(entry['params']), []).append(entry)
+        self._cursors: Dict[Optional[str], int] = {}
+        self._lock = threading.Lock()
+
+    def _load(self) -> List[Dict]:
+        """Загрузка записи"""
+        entries = []
+        try:
+            with gzip.open(self.capture_file, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entries.append(codec.loads(line))
+        except EOFError:
+            # Последний фрагмент мог не дописаться
+            pass
+        except Exception as e:
+            logger.error("Ошибка чтения записи hh.ru: %s", e)
+        logger.info("Загружено %s записанных ответов hh.ru", len(entries))
+        return entries
+
+    @property
+    def entries(self) -> List[Dict]:
+        """Записанные запросы и ответы"""
+        return self._entries
+
+    def _next(self, key: Optional[str], entries: List[Dict]) -> Tuple[Dict, int]:
+        """Следующая запись по кругу и номер прохода по записям"""
+        with self._lock:
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+        return entries[cursor % len(entries)], cursor // len(entries)
+
+    @staticmethod
+    def _clone(item: Dict, suffix: str) -> Dict:
+        """Копия вакансии с новым ID и работодателем
+
+        Меняется и работодатель: иначе детектор повторных публикаций
+        считает копии перепубликацией исходной вакансии.
+        """
+        clone = dict(item)
+        clone['id'] = f"{item.get('id')}{suffix}"
+        employer = dict(item.get('employer') or {})
+        employer['id'] = f"{employer.get('id') or ''}{suffix}"
+        clone['employer'] = employer
+        return clone
+
+    def _scale_body(self, body: str, round_number: int) -> bytes:
+        """Размножение вакансий в ответе
+
+        При повторном проходе по записи ID и работодатели всех вакансий
+        получают номер прохода, чтобы каждый цикл видел новые вакансии.
+        """
+        if self.scale == 1 and round_number == 0:
+            return body.encode('utf-8')
+
+        data = codec.loads(body)
+        items = data.get('items', [])
+        scaled = []
+        for copy in range(self.scale):
+            for item in items:
+                if copy == 0 and round_number == 0:
+                    scaled.append(item)
+                else:
+                    scaled.append(self._clone(item, f"-{round_number}-{copy}"))
+        data['items'] = scaled
+        return codec.dumps(data)
+
+    def get(self, url: str, params: Dict) -> ReplayResponse:
+        """Ответ на запрос из записи"""
+        if not self._entries:
+            raise requests.exceptions.ConnectionError("Запись hh.ru пуста")
+
+        key = _params_key(params)
+        matching = self._by_params.get(key)
+        entry, round_number = (
+            self._next(key, matching) if matching else self._next(None, self._entries)
+        )
+
+        if self.speed > 0:
+            time.sleep(entry['elapsed'] / self.speed)
+
+        return ReplayResponse(
+            url,
+            entry['status'],
+            self._scale_body(entry['body'], round_number),
+            entry['elapsed']
+        )
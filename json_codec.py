@@ -0,0 +1,194 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional, TypedDict
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class JsonDecodeError(ValueError):
+    """Ошибка разбора JSON независимо от бэкенда"""
+
+
+# Поля вакансии, которые использует бот. Остальные поля ответа hh.ru
+# типизированный декодер пропускает, не создавая для них объектов.
+class _Named(TypedDict, total=False):
+    id: Optional[str]
+    name: Optional[str]
+
+
+_Salary = TypedDict('_Salary', {
+    'from': Optional[int],
+    'to': Optional[int],
+    'currency': Optional[str],
+}, total=False)
+
+
+class _Snippet(TypedDict, total=False):
+    requirement: Optional[str]
+    responsibility: Optional[str]
+
+
+class _Vacancy(TypedDict, total=False):
+    id: str
+    name: str
+    employer: Optional[_Named]
+    area: Optional[_Named]
+    salary: Optional[_Salary]
+    experience: Optional[_Named]
+    employment: Optional[_Named]
+    alternate_url: str
+    snippet: Optional[_Snippet]
+    published_at: str
+
+
+class _SearchResponse(TypedDict, total=False):
+    items: List[_Vacancy]
+    found: int
+    pages: int
+
+
+class JsonCodec:
+    """Стандартный модуль json"""
+
+    name = 'json'
+
+    def loads(self, data) -> Any:
+        """Разбор JSON из bytes или str"""
+        try:
+            return json.loads(data)
+        except ValueError as e:
+            raise JsonDecodeError(str(e)) from e
+
+    def dumps(self, obj: Any, pretty: bool = False) -> bytes:
+        """Сериализация в UTF-8"""
+        text = json.dumps(
+            obj,
+            ensure_ascii=False,
+            indent=2 if pretty else None,
+            separators=None if pretty else (',', ':')
+        )
+        return text.encode('utf-8')
+
+    def decode_search(self, data) -> Dict:
+        """Ответ поиска hh.ru: items, found, pages"""
+        return self.loads(data)
+
+    def decode_vacancies(self, data) -> List[Dict]:
+        """Список вакансий из ответа поиска hh.ru"""
+        return self.decode_search(data).get('items', [])
+
+
+class OrjsonCodec(JsonCodec):
+    """Бэкенд orjson"""
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def loads(self, data) -> Any:
+        try:
+            return self._orjson.loads(data)
+        except self._orjson.JSONDecodeError as e:
+            raise JsonDecodeError(str(e)) from e
+
+    def dumps(self, obj: Any, pretty: bool = False) -> bytes:
+        option = self._orjson.OPT_INDENT_2 if pretty else 0
+        return self._orjson.dumps(obj, option=option)
+
+
+class MsgspecCodec(JsonCodec):
+    """Бэкенд msgspec с типизированным разбором ответа поиска"""
+
+    name = 'msgspec'
+
+    def __init__(self):
+        import msgspec
+        self._msgspec = msgspec
+        self._decoder = msgspec.json.Decoder()
+        self._search_decoder = msgspec.json.Decoder(_SearchResponse)
+        self._encoder = msgspec.json.Encoder()
+
+    def loads(self, data) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except self._msgspec.DecodeError as e:
+            raise JsonDecodeError(str(e)) from e
+
+    def dumps(self, obj: Any, pretty: bool = False) -> bytes:
+        encoded = self._encoder.encode(obj)
+        if pretty:
+            return self._msgspec.json.format(encoded, indent=2)
+        return encoded
+
+    def decode_search(self, data) -> Dict:
+        try:
+            return self._search_decoder.decode(data)
+        except self._msgspec.ValidationError as e:
+            # Ответ не совпал со схемой (например, изменился тип поля) —
+            # разбираем без схемы, чтобы не потерять вакансии
+            logger.warning("Ответ hh.ru не соответствует схеме: %s", e)
+            return super().decode_search(data)
+        except self._msgspec.DecodeError as e:
+            raise JsonDecodeError(str(e)) from e
+
+
+CODECS = {
+    'msgspec': MsgspecCodec,
+    'orjson': OrjsonCodec,
+    'json': JsonCodec,
+}
+
+
+def available_codecs() -> List[JsonCodec]:
+    """Все бэкенды, доступные в текущем окружении"""
+    codecs = []
+    for codec_class in CODECS.values():
+        try:
+            codecs.append(codec_class())
+        except ImportError:
+            pass
+    return codecs
+
+
+def get_codec(name: Optional[str] = None) -> JsonCodec:
+    """Выбор бэкенда: указанный по имени или самый быстрый из доступных"""
+    if name:
+        try:
+            return CODECS[name]()
+        except (KeyError, ImportError):
+            logger.warning("JSON-бэкенд %s недоступен, выбираем автоматически", name)
+    return available_codecs()[0]
+
+
+class _SelectedCodec:
+    """Бэкенд, через который работает приложение
+
+    Модули импортируют объект codec один раз, а бэкенд за ним выбирается
+    вызовом configure() при запуске. Если configure() не вызывали (тесты,
+    отдельные скрипты), при первом обращении берётся самый быстрый из
+    доступных.
+    """
+
+    def __init__(self):
+        self._backend: Optional[JsonCodec] = None
+
+    def configure(self, name: Optional[str] = None):
+        """Выбор бэкенда по имени"""
+        self._backend = get_codec(name)
+        logger.info("JSON-бэкенд: %s", self._backend.name)
+
+    def __getattr__(self, attr: str) -> Any:
+        if self._backend is None:
+            self._backend = get_codec()
+        return getattr(self._backend, attr)
+
+
+codec = _SelectedCodec()
+
+
+def configure(config: Config):
+    """Выбор JSON-бэкенда по настройке JSON_CODEC"""
+    codec.configure(config.json_codec)
@@ -0,0 +1,208 @@
+import copy
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Tuple
+from config import Config
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler с облегчённой подготовкой записи
+
+    Стандартный QueueHandler.prepare() полностью форматирует запись
+    (время, уровень, имя логгера) ещё в вызывающем потоке, то есть в
+    event loop. Здесь в вызывающем потоке только подставляются аргументы
+    и запоминается текст исключения — после этого изменение объектов из
+    args уже не влияет на запись, — а остальное форматирование выполняет
+    поток QueueListener.
+    """
+
+    _exception_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        message = record.getMessage()
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = self._exception_formatter.formatException(record.exc_info)
+
+        record = copy.copy(record)
+        record.msg = message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = exc_text
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """Ограничение частоты повторяющихся предупреждений и ошибок
+
+    Повтором считается запись с тем же логгером, уровнем и шаблоном
+    сообщения (до подстановки аргументов). В каждом окне пропускаются
+    первые burst записей, остальные подавляются. Число подавленных
+    сообщается в следующей пропущенной записи, а если повторов больше не
+    было — отдельной записью по окончании окна (см. pop_suppressed).
+    """
+
+    def __init__(self, window_seconds: float, burst: int):
+        super().__init__()
+        self.window_seconds = window_seconds
+        self.burst = burst
+        self._lock = threading.Lock()
+        # ключ -> [начало окна, пропущено в окне, подавлено]
+        self._state: Dict[Tuple[str, int, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None or now - state[0] >= self.window_seconds:
+                suppressed = state[2] if state else 0
+                self._state[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+
+            if state[1] < self.burst:
+                state[1] += 1
+                return True
+
+            state[2] += 1
+            return False
+
+    def pop_suppressed(self, force: bool = False) -> List[logging.LogRecord]:
+        """Итоговые записи о подавленных повторах в завершившихся окнах
+
+        Завершившиеся окна удаляются из состояния. force=True закрывает
+        все окна — используется при остановке логирования.
+        """
+        now = time.monotonic()
+        summaries = []
+        with self._lock:
+            for key, state in list(self._state.items()):
+                if not force and now - state[0] < self.window_seconds:
+                    continue
+                del self._state[key]
+                if state[2]:
+                    summaries.append(self._summary(key, state[2]))
+        return summaries
+
+    @staticmethod
+    def _summary(key: Tuple[str, int, str], suppressed: int) -> logging.LogRecord:
+        """Запись с числом подавленных повторов шаблона"""
+        name, level, template = key
+        record = logging.LogRecord(
+            name, level, '', 0, "Повторы подавлены: %s", (template,), None
+        )
+        record.msg = record.getMessage()
+        record.args = None
+        record.suppressed = suppressed
+        return record
+
+
+class _RateLimitedQueueListener(QueueListener):
+    """QueueListener, сообщающий о подавленных повторах
+
+    Пока очередь пуста, поток listener раз в poll_interval секунд
+    выводит итоги завершившихся окон RateLimitFilter; при остановке
+    выводятся итоги всех окон.
+    """
+
+    poll_interval = 1.0
+
+    def __init__(self, log_queue, *handlers, rate_limit: RateLimitFilter,
+                 respect_handler_level: bool = False):
+        super().__init__(log_queue, *handlers, respect_handler_level=respect_handler_level)
+        self.rate_limit = rate_limit
+
+    def dequeue(self, block: bool):
+        while True:
+            try:
+                return self.queue.get(block, self.poll_interval)
+            except queue.Empty:
+                self._emit_summaries(force=False)
+
+    def _emit_summaries(self, force: bool):
+        """Вывод итогов подавления"""
+        for record in self.rate_limit.pop_suppressed(force):
+            self.handle(record)
+
+    def stop(self):
+        super().stop()
+        self._emit_summaries(force=True)
+
+
+class TextFormatter(logging.Formatter):
+    """Текстовый формат с отметкой о подавленных повторах"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            message += f" (подавлено повторов: {suppressed})"
+        return message
+
+
+class JsonFormatter(logging.Formatter):
+    """Структурированный вывод: одна JSON-запись на строку"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logging(config: Config) -> QueueListener:
+    """Настройка неблокирующего логирования
+
+    Все записи попадают в очередь, а вывод в stdout выполняет фоновый
+    поток QueueListener. Возвращает запущенный listener, который нужно
+    остановить при завершении работы.
+    """
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if config.log_json:
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(TextFormatter(TEXT_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    rate_limit = RateLimitFilter(
+        config.LOG_RATE_LIMIT_SECONDS,
+        config.LOG_RATE_LIMIT_BURST
+    )
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(rate_limit)
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(config.LOG_LEVEL)
+
+    listener = _RateLimitedQueueListener(
+        log_queue,
+        stream_handler,
+        rate_limit=rate_limit,
+        respect_handler_level=True
+    )
+    listener.start()
+    return listener
@@ -1,16 +1,13 @@
 import asyncio
 import logging
+import json_codec
 from config import Config
 from bot import VacancyBot
+from logging_setup import setup_logging
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
-async def main():
-    config = Config()
+async def main(config: Config):
     if not config.validate():
         logger.error("Ошибка конфигурации. Проверьте настройки!")
         return
@@ -19,7 +16,12 @@ async def main():
     await bot.start()
 
 if __name__ == "__main__":
+    config = Config()
+    listener = setup_logging(config)
+    json_codec.configure(config)
     try:
-        asyncio.run(main())
+        asyncio.run(main(config))
     except KeyboardInterrupt:
         logger.info("Бот остановлен пользователем")
+    finally:
+        listener.stop()
@@ -0,0 +1,140 @@
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class _StepTimer:
+    """Обёртка над корутиной, замеряющая каждый синхронный шаг
+
+    Между двумя точками await корутина выполняется синхронно и держит
+    event loop. Самый длинный такой шаг показывает, насколько обработчик
+    блокирует остальные задачи.
+    """
+
+    def __init__(self, coro):
+        self._coro = coro
+        self.max_step = 0.0
+
+    def __await__(self):
+        value = None
+        error = None
+        while True:
+            started = time.perf_counter()
+            try:
+                if error is not None:
+                    yielded = self._coro.throw(error)
+                else:
+                    yielded = self._coro.send(value)
+            except StopIteration as stop:
+                self._track(started)
+                return stop.value
+            except BaseException:
+                self._track(started)
+                raise
+            self._track(started)
+
+            try:
+                value = yield yielded
+                error = None
+            except BaseException as e:
+                value = None
+                error = e
+
+    def _track(self, started: float):
+        """Учёт длительности шага"""
+        self.max_step = max(self.max_step, time.perf_counter() - started)
+
+
+class LatencyTracker:
+    """Скользящие окна длительностей по обработчикам"""
+
+    def __init__(self, config: Config):
+        self.window = config.PERF_WINDOW_SIZE
+        self.block_threshold = config.PERF_BLOCK_THRESHOLD_MS / 1000
+        self._samples: Dict[str, Deque[float]] = {}
+        self._blocking: Dict[str, int] = {}
+
+    def record(self, name: str, duration: float, max_step: Optional[float] = None):
+        """Запись длительности обработки"""
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self.window)
+        samples.append(duration)
+
+        if max_step is not None and max_step >= self.block_threshold:
+            self._blocking[name] = self._blocking.get(name, 0) + 1
+            logger.warning(
+                "Обработчик %s заблокировал event loop на %.1f мс",
+                name, max_step * 1000
+            )
+
+    @staticmethod
+    def _percentile(ordered: List[float], q: float) -> float:
+        """Перцентиль по отсортированной выборке"""
+        index = min(int(q * len(ordered)), len(ordered) - 1)
+        return ordered[index]
+
+    def get_report(self) -> List[Dict]:
+        """Сводка p50/p99 по обработчикам, самые медленные сверху"""
+        report = []
+        for name, samples in self._samples.items():
+            ordered = sorted(samples)
+            report.append({
+                'name': name,
+                'count': len(ordered),
+                'p50': self._percentile(ordered, 0.5),
+                'p99': self._percentile(ordered, 0.99),
+                'blocking': self._blocking.get(name, 0),
+            })
+        report.sort(key=lambda item: item['p99'], reverse=True)
+        return report
+
+
+class UpdateLatencyMiddleware(BaseMiddleware):
+    """Outer-middleware: полное время обработки события роутером"""
+
+    def __init__(self, tracker: LatencyTracker, event_name: str):
+        self.tracker = tracker
+        self.event_name = event_name
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            self.tracker.record(f"update:{self.event_name}", time.perf_counter() - started)
+
+
+class HandlerLatencyMiddleware(BaseMiddleware):
+    """Inner-middleware: время и блокировки отдельного обработчика"""
+
+    def __init__(self, tracker: LatencyTracker):
+        self.tracker = tracker
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        handler_object = data.get('handler')
+        callback = getattr(handler_object, 'callback', None)
+        name = getattr(callback, '__name__', 'unknown')
+
+        timer = _StepTimer(handler(event, data))
+        started = time.perf_counter()
+        try:
+            return await timer
+        finally:
+            self.tracker.record(name, time.perf_counter() - started, timer.max_step)
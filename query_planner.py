@@ -0,0 +1,103 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PlannedQuery:
+    """Один запрос к hh.ru, покрывающий группу подписок"""
+
+    def __init__(self, filters: Dict, subscriptions: List[int]):
+        self.filters = filters
+        self.subscriptions = subscriptions
+
+    def __repr__(self) -> str:
+        return f"PlannedQuery({self.filters!r}, subscriptions={self.subscriptions!r})"
+
+
+class QueryPlanner:
+    """Объединение похожих подписок в меньшее число запросов к hh.ru
+
+    Подписки с одинаковым текстом, регионом и зарплатой обслуживаются
+    одним более широким запросом с объединением значений опыта.
+    Результаты раскладываются по подпискам локальной проверкой опыта.
+
+    Зарплата входит в ключ группы, а не ослабляется до минимальной:
+    hh.ru отбирает по ней вакансии, в вилку которых входит указанное
+    значение, с пересчётом валют по своему курсу. Выдачи с разной
+    зарплатой не вложены друг в друга, и локально их не воспроизвести,
+    поэтому такие подписки запрашиваются отдельно.
+    """
+
+    @staticmethod
+    def group_key(subscription: Dict) -> Tuple[str, int, Optional[int]]:
+        """Ключ группы: нормализованный текст, регион и зарплата"""
+        text = ' '.join((subscription.get('position') or '').lower().split())
+        return text, subscription.get('area_id', 1), subscription.get('salary') or None
+
+    @staticmethod
+    def _experience(subscription: Dict) -> Optional[List[str]]:
+        """Допустимые значения опыта подписки (None — любой)"""
+        experience = subscription.get('experience')
+        if not experience:
+            return None
+        if isinstance(experience, str):
+            return [experience]
+        return list(experience)
+
+    def plan(self, subscriptions: List[Dict]) -> List[PlannedQuery]:
+        """Построение плана запросов"""
+        groups: Dict[Tuple[str, int, Optional[int]], List[int]] = {}
+        for index, subscription in enumerate(subscriptions):
+            groups.setdefault(self.group_key(subscription), []).append(index)
+
+        queries = []
+        for indexes in groups.values():
+            members = [subscriptions[i] for i in indexes]
+            first = members[0]
+
+            experience = set()
+            for member in members:
+                values = self._experience(member)
+                if values is None:
+                    experience = None
+                    break
+                experience.update(values)
+
+            queries.append(PlannedQuery(
+                {
+                    'position': first.get('position', ''),
+                    'area_id': first.get('area_id', 1),
+                    'experience': sorted(experience) if experience else None,
+                    'salary': first.get('salary') or None,
+                },
+                indexes
+            ))
+
+        logger.info("Запланировано %s запросов для %s подписок", len(queries), len(subscriptions))
+        return queries
+
+    @classmethod
+    def matches(cls, vacancy: Dict, subscription: Dict) -> bool:
+        """Проверка вакансии на условия конкретной подписки
+
+        Текст, регион и зарплату hh.ru проверил при поиске — они общие
+        для группы, — локально остаётся только опыт.
+        """
+        experience = cls._experience(subscription)
+        if experience is None:
+            return True
+        return (vacancy.get('experience') or {}).get('id') in experience
+
+    def route(self, query: PlannedQuery, vacancies: List[Dict],
+              subscriptions: List[Dict]) -> Dict[int, List[Dict]]:
+        """Распределение результатов запроса по подпискам группы"""
+        if len(query.subscriptions) == 1:
+            # Запрос построен из одной подписки и совпадает с ней —
+            # hh.ru уже отфильтровал результаты
+            return {query.subscriptions[0]: vacancies}
+
+        return {
+            index: [v for v in vacancies if self.matches(v, subscriptions[index])]
+            for index in query.subscriptions
+        }
@@ -0,0 +1,128 @@
+import json
+from config import Config
+from query_planner import QueryPlanner
+from vacancy_parser import VacancyParser
+
+
+class FakeResponse:
+    def __init__(self, items, pages):
+        self.content = json.dumps({'items': items, 'found': len(items) * pages, 'pages': pages})
+
+    def raise_for_status(self):
+        pass
+
+
+def parser_config(tmp_path):
+    config = Config()
+    config.SEEN_VACANCIES_FILE = tmp_path / "seen_vacancies.json"
+    config.SEEN_INDEX_FILE = tmp_path / "seen_vacancies.idx"
+    config.SEEN_DELTA_FILE = tmp_path / "seen_vacancies.delta"
+    config.DEDUP_FILE = tmp_path / "vacancy_fingerprints.json"
+    config.STATS_FILE = tmp_path / "vacancy_stats.json"
+    config.MAX_VACANCIES_PER_PAGE = 2
+    return config
+
+
+def vacancy(vacancy_id, experience, salary=None):
+    return {
+        'id': str(vacancy_id),
+        'name': "Python разработчик",
+        'experience': {'id': experience},
+        'salary': salary,
+    }
+
+
+SUBSCRIPTIONS = [
+    {'position': "Python разработчик", 'experience': 'noExperience'},
+    {'position': "python  разработчик", 'experience': 'between1And3'},
+]
+
+
+def fake_request(pages, requested):
+    def request(params):
+        requested.append(dict(params))
+        return FakeResponse(pages[params['page']], len(pages))
+    return request
+
+
+def test_subscriptions_with_different_salary_are_not_merged():
+    subscriptions = [
+        {'position': "Python разработчик", 'salary': 100000},
+        {'position': "Python разработчик", 'salary': 300000},
+        {'position': "Python разработчик", 'salary': 100000, 'experience': 'noExperience'},
+    ]
+
+    queries = QueryPlanner().plan(subscriptions)
+
+    assert [q.subscriptions for q in queries] == [[0, 2], [1]]
+    assert queries[0].filters['salary'] == 100000
+    assert queries[0].filters['experience'] is None
+
+
+def test_routing_keeps_salaries_checked_by_hh():
+    subscriptions = [
+        {'position': "Python разработчик", 'salary': 100000},
+        {'position': "Python разработчик", 'salary': 100000, 'experience': 'noExperience'},
+    ]
+    planner = QueryPlanner()
+    query = planner.plan(subscriptions)[0]
+    vacancies = [
+        vacancy(1, 'noExperience', {'from': 2000, 'to': None, 'currency': 'USD'}),
+        vacancy(2, 'noExperience', {'from': 150000, 'to': None, 'currency': 'RUR'}),
+        vacancy(3, 'between1And3', {'from': 90000, 'to': None, 'currency': 'RUR'}),
+    ]
+
+    routed = planner.route(query, vacancies, subscriptions)
+
+    assert [v['id'] for v in routed[0]] == ['1', '2', '3']
+    assert [v['id'] for v in routed[1]] == ['1', '2']
+
+
+def test_merged_query_is_ordered_by_publication_time_and_paged(tmp_path):
+    parser = VacancyParser(parser_config(tmp_path))
+    pages = [
+        [vacancy(1, 'noExperience'), vacancy(2, 'noExperience')],
+        [vacancy(3, 'between1And3'), vacancy(4, 'noExperience')],
+        [vacancy(5, 'between1And3'), vacancy(6, 'between1And3')],
+    ]
+    requested = []
+    parser._request = fake_request(pages, requested)
+
+    result = parser.fetch_for_subscriptions(SUBSCRIPTIONS)
+
+    assert [p['page'] for p in requested] == [0, 1, 2]
+    assert all(p['order_by'] == 'publication_time' for p in requested)
+    assert [v['id'] for v in result[0]] == ['1', '2']
+    assert [v['id'] for v in result[1]] == ['3', '5']
+
+
+def test_merged_query_stops_at_seen_vacancies(tmp_path):
+    parser = VacancyParser(parser_config(tmp_path))
+    parser.storage.add('2')
+    pages = [
+        [vacancy(1, 'between1And3'), vacancy(2, 'noExperience')],
+        [vacancy(3, 'between1And3'), vacancy(4, 'noExperience')],
+    ]
+    requested = []
+    parser._request = fake_request(pages, requested)
+
+    result = parser.fetch_for_subscriptions(SUBSCRIPTIONS)
+
+    assert len(requested) == 1
+    assert [v['id'] for v in result[0]] == ['2']
+    assert [v['id'] for v in result[1]] == ['1']
+
+
+def test_merged_query_page_limit(tmp_path):
+    config = parser_config(tmp_path)
+    config.MERGED_QUERY_MAX_PAGES = 2
+    parser = VacancyParser(config)
+    pages = [[vacancy(i * 2 + 1, 'noExperience'), vacancy(i * 2 + 2, 'noExperience')] for i in range(10)]
+    requested = []
+    parser._request = fake_request(pages, requested)
+
+    result = parser.fetch_for_subscriptions(SUBSCRIPTIONS)
+
+    assert len(requested) == 2
+    assert [v['id'] for v in result[0]] == ['1', '2']
+    assert result[1] == []
@@ -0,0 +1,77 @@
+import pytest
+from config import Config
+from vacancy_dedup import RepostDetector
+
+
+TITLES = [
+    "Python разработчик", "Менеджер проектов", "Data scientist", "iOS разработчик",
+    "Android разработчик", "Frontend developer", "Бухгалтер", "Аналитик данных",
+    "DevOps инженер", "QA инженер", "Системный администратор", "Дизайнер интерфейсов",
+    "Java разработчик", "Go разработчик", "Технический писатель", "HR менеджер",
+    "Product manager", "Юрист", "Продавец-консультант", "Офис-менеджер",
+]
+
+
+def vacancy(name, employer_id='42', area_id='1', salary=None):
+    return {
+        'name': name,
+        'employer': {'id': employer_id},
+        'area': {'id': area_id},
+        'salary': salary,
+    }
+
+
+def detector_config(tmp_path):
+    config = Config()
+    config.DEDUP_FILE = tmp_path / "fingerprints.json"
+    return config
+
+
+@pytest.fixture
+def detector(tmp_path):
+    return RepostDetector(detector_config(tmp_path))
+
+
+def test_distinct_titles_from_one_employer_are_not_reposts(detector):
+    reposts = [detector.check_and_add(vacancy(title)) for title in TITLES]
+    assert not any(reposts)
+
+
+def test_repost_with_reworded_title_is_detected(detector):
+    salary = {'from': 100000, 'to': 150000, 'currency': 'RUR'}
+    assert not detector.check_and_add(vacancy("Python разработчик", salary=salary))
+    assert detector.check_and_add(vacancy("Python разработчик (удаленно)", salary=salary))
+    assert detector.check_and_add(vacancy("Senior Python разработчик", salary=salary))
+
+
+def test_salary_is_compared_with_tolerance(detector):
+    assert not detector.check_and_add(vacancy("Курьер", salary={'from': 100000, 'currency': 'RUR'}))
+    assert detector.check_and_add(vacancy("Курьер", salary={'from': 110000, 'currency': 'RUR'}))
+    assert not detector.check_and_add(vacancy("Курьер"))
+    assert not detector.check_and_add(vacancy("Курьер", salary={'from': 200000, 'currency': 'RUR'}))
+    assert not detector.check_and_add(vacancy("Курьер", salary={'from': 1000, 'currency': 'USD'}))
+
+    salary = {'from': 100000, 'to': 150000, 'currency': 'RUR'}
+    assert not detector.check_and_add(vacancy("Менеджер по продажам", salary=salary))
+    salary = {'from': 120000, 'to': 150000, 'currency': 'RUR'}
+    assert detector.check_and_add(vacancy("Менеджер по продажам B2B", salary=salary))
+
+
+def test_same_title_from_other_employer_or_area_is_not_repost(detector):
+    assert not detector.check_and_add(vacancy("Python разработчик"))
+    assert not detector.check_and_add(vacancy("Python разработчик", employer_id='7'))
+    assert not detector.check_and_add(vacancy("Python разработчик", area_id='2'))
+
+
+def test_fingerprints_survive_reload_and_expire(tmp_path, detector):
+    detector.check_and_add(vacancy("Python разработчик"), now=1000.0)
+    detector.save()
+
+    reloaded = RepostDetector(detector_config(tmp_path))
+    assert reloaded.count() == 0  # запись старше TTL отбрасывается при загрузке
+
+    detector.check_and_add(vacancy("Go разработчик"))
+    detector.save()
+    reloaded = RepostDetector(detector_config(tmp_path))
+    assert reloaded.check_and_add(vacancy("Go разработчик"))
+
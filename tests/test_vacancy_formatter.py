@@ -0,0 +1,22 @@
+from vacancy_parser import VacancyFormatter
+
+
+def test_render_handles_missing_names():
+    message = VacancyFormatter.render({
+        'name': "C++ & Go <senior>",
+        'experience': {'id': 'noExperience', 'name': None},
+        'employment': {'name': None},
+    })
+
+    assert "<b>C++ &amp; Go &lt;senior&gt;</b>" in message
+    assert "Опыт: Не указан" in message
+    assert "Занятость: Не указана" in message
+
+
+def test_formatted_messages_are_cached_by_id():
+    formatter = VacancyFormatter(cache_size=1)
+    first = formatter.format_vacancy({'id': '1', 'name': "Python разработчик"})
+    assert formatter.format_vacancy({'id': '1', 'name': "Другое"}) is first
+
+    formatter.format_vacancy({'id': '2', 'name': "Go разработчик"})
+    assert "Другое" in formatter.format_vacancy({'id': '1', 'name': "Другое"})
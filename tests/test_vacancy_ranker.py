@@ -0,0 +1,33 @@
+from config import Config
+from vacancy_ranker import VacancyRanker
+
+
+def vacancy(vacancy_id, name):
+    return {'id': str(vacancy_id), 'name': name}
+
+
+def test_ranking_orders_by_relevance_and_splits_by_top_k():
+    ranker = VacancyRanker(Config())
+    vacancies = [
+        vacancy(1, "Бухгалтер"),
+        vacancy(2, "Senior Python developer"),
+        vacancy(3, "Python разработчик"),
+    ]
+
+    selected, overflow, rejected = ranker.rank(
+        vacancies, [{'position': "Python разработчик", 'top_k': 1}]
+    )[0]
+
+    assert [v['id'] for v in selected] == ['3']
+    assert [v['id'] for v in overflow] == ['2']
+    assert [v['id'] for v in rejected] == ['1']
+
+
+def test_query_without_words_is_not_ranked():
+    ranker = VacancyRanker(Config())
+    vacancies = [vacancy(i, f"Вакансия {i}") for i in range(30)]
+
+    for position in ("", "  ", "!!!"):
+        selected, overflow, rejected = ranker.rank(vacancies, [{'position': position}])[0]
+        assert selected == vacancies
+        assert overflow == [] and rejected == []
@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+from config import Config
+from vacancy_stats import QueryStats, VacancyAnalytics
+
+
+def test_per_day_is_averaged_over_observed_days():
+    stats = QueryStats(history_days=30, compression=100)
+    today = date(2026, 10, 19)
+    for _ in range(6):
+        stats.add({'salary': None}, today)
+    for _ in range(4):
+        stats.add({'salary': None}, today - timedelta(days=1))
+
+    summary = stats.summary(today)
+    assert summary['days'] == 2
+    assert summary['per_day'] == 5
+
+
+def test_per_day_window_is_capped():
+    stats = QueryStats(history_days=30, compression=100)
+    today = date(2026, 10, 19)
+    for i in range(14):
+        stats.add({'salary': None}, today - timedelta(days=i))
+
+    summary = stats.summary(today)
+    assert summary['days'] == 7
+    assert summary['per_day'] == 1
+
+
+def test_stats_are_kept_per_search_filters(tmp_path):
+    config = Config()
+    config.STATS_FILE = tmp_path / "stats.json"
+    analytics = VacancyAnalytics(config)
+    today = date(2026, 10, 19)
+    moscow = {'position': "Python разработчик", 'area_id': 1, 'salary': 100000}
+    spb = dict(moscow, area_id=2)
+
+    analytics.record(moscow, [{'salary': None}] * 3, today)
+    analytics.record(spb, [{'salary': None}], today)
+
+    assert analytics.get_summary(moscow, today)['total'] == 3
+    assert analytics.get_summary(dict(moscow, position="python  Разработчик"), today)['total'] == 3
+    assert analytics.get_summary(spb, today)['total'] == 1
+    assert analytics.get_summary(dict(moscow, experience='noExperience'), today) is None
@@ -0,0 +1,102 @@
+import json
+import pytest
+from config import Config
+from vacancy_parser import VacancyStorage
+
+
+def storage_config(tmp_path, merge_threshold=5000):
+    config = Config()
+    config.SEEN_VACANCIES_FILE = tmp_path / "seen_vacancies.json"
+    config.SEEN_INDEX_FILE = tmp_path / "seen_vacancies.idx"
+    config.SEEN_DELTA_FILE = tmp_path / "seen_vacancies.delta"
+    config.SEEN_DELTA_MERGE_THRESHOLD = merge_threshold
+    return config
+
+
+@pytest.fixture
+def config(tmp_path):
+    return storage_config(tmp_path)
+
+
+def test_legacy_json_is_migrated(config):
+    config.SEEN_VACANCIES_FILE.write_text(json.dumps(["3", "1", "2", "abc"]))
+
+    storage = VacancyStorage(config)
+
+    assert storage.count() == 4
+    assert config.SEEN_INDEX_FILE.exists()
+    assert all(storage.contains(i) for i in ("1", "2", "3", "abc"))
+    assert not storage.contains("4")
+
+    # Повторный запуск читает индекс и не переносит историю ещё раз
+    assert VacancyStorage(config).count() == 4
+
+
+def test_reload_after_partial_journal_write(config):
+    storage = VacancyStorage(config)
+    storage.add("100")
+    storage.add("200")
+    storage.save()
+    with open(config.SEEN_DELTA_FILE, 'ab') as f:
+        f.write(b'\x01\x02\x03')
+
+    reloaded = VacancyStorage(config)
+
+    assert reloaded.count() == 2
+    assert reloaded.contains("100") and reloaded.contains("200")
+    reloaded.add("300")
+    reloaded.save()
+    assert VacancyStorage(config).contains("300")
+
+
+def test_delta_is_merged_at_threshold(tmp_path):
+    config = storage_config(tmp_path, merge_threshold=3)
+    storage = VacancyStorage(config)
+    storage.add("5")
+    storage.add("1")
+    storage.save()
+    assert not config.SEEN_INDEX_FILE.exists()
+
+    storage.add("3")
+    storage.save()
+
+    assert config.SEEN_INDEX_FILE.stat().st_size == 3 * 8
+    assert not config.SEEN_DELTA_FILE.exists()
+    assert list(storage._index) == [1, 3, 5]
+    assert not storage.add("3")
+    assert storage.add("4")
+    storage.save()
+
+    reloaded = VacancyStorage(config)
+    assert reloaded.count() == 4
+    assert all(reloaded.contains(i) for i in ("1", "3", "4", "5"))
+
+
+def test_non_numeric_ids(config):
+    storage = VacancyStorage(config)
+    big = str(1 << 64)
+
+    assert storage.add("abc")
+    assert storage.add(big)
+    assert not storage.add("abc")
+    storage.save()
+    storage.merge()
+
+    reloaded = VacancyStorage(config)
+    assert reloaded.contains("abc") and reloaded.contains(big)
+    assert not reloaded.contains("abd")
+
+
+def test_clear_removes_all_files(config):
+    config.SEEN_VACANCIES_FILE.write_text(json.dumps(["1"]))
+    storage = VacancyStorage(config)
+    storage.add("2")
+    storage.save()
+
+    storage.clear()
+
+    assert storage.count() == 0
+    assert not storage.contains("1")
+    for path in (config.SEEN_VACANCIES_FILE, config.SEEN_INDEX_FILE, config.SEEN_DELTA_FILE):
+        assert not path.exists()
+    assert VacancyStorage(config).count() == 0
@@ -0,0 +1,252 @@
+import hashlib
+import logging
+import re
+import time
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+import numpy as np
+from config import Config
+from json_codec import codec
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 4
+BAND_COUNT = 16
+BAND_ROWS = 2
+SIGNATURE_SIZE = BAND_COUNT * BAND_ROWS
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Параметры хэш-функций MinHash: h(x) = a * x + b по модулю 2^64.
+# Генератор с фиксированным зерном, чтобы подписи не менялись между запусками
+_rng = np.random.default_rng(0x6868)
+_HASH_A = _rng.integers(1, 2 ** 63, SIGNATURE_SIZE, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_HASH_B = _rng.integers(0, 2 ** 63, SIGNATURE_SIZE, dtype=np.uint64)
+
+Salary = Optional[Tuple[Optional[int], Optional[int], Optional[str]]]
+EntryKey = Tuple[str, str, Salary]
+
+
+def _hash64(feature: str) -> int:
+    """Стабильный 64-битный хэш признака (не зависит от PYTHONHASHSEED)"""
+    digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class VacancyFingerprint:
+    """Признаки вакансии для поиска перепостов
+
+    Работодатель и регион входят в ключ группы и сравниваются точно.
+    Название сравнивается по шинглам: символьным n-граммам и целым
+    словам, — поэтому дописанное слово или другая пунктуация меняют
+    лишь часть признаков. Зарплата проверяется отдельно с допуском.
+    """
+
+    @staticmethod
+    def normalize_name(name: str) -> str:
+        """Нормализация названия вакансии"""
+        return ' '.join(_TOKEN_RE.findall(name.lower().replace('ё', 'е')))
+
+    @staticmethod
+    def group_key(vacancy: Dict) -> str:
+        """Точная часть ключа: работодатель и регион"""
+        employer_id = (vacancy.get('employer') or {}).get('id')
+        area_id = (vacancy.get('area') or {}).get('id')
+        return f"{employer_id}:{area_id}"
+
+    @staticmethod
+    def shingles(name: str) -> FrozenSet[str]:
+        """Символьные n-граммы нормализованного названия и его слова"""
+        padded = f" {name} "
+        shingles = {
+            padded[i:i + SHINGLE_SIZE]
+            for i in range(max(1, len(padded) - SHINGLE_SIZE + 1))
+        }
+        shingles.update(f"w:{word}" for word in name.split())
+        return frozenset(shingles)
+
+    @staticmethod
+    def minhash(shingles: FrozenSet[str]) -> np.ndarray:
+        """MinHash-подпись множества шинглов"""
+        hashes = np.fromiter(
+            (_hash64(shingle) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        # Переполнение uint64 здесь и есть взятие по модулю 2^64
+        return (hashes[:, None] * _HASH_A + _HASH_B).min(axis=0)
+
+    @staticmethod
+    def salary(vacancy: Dict) -> Salary:
+        """Зарплатная вилка вакансии"""
+        salary = vacancy.get('salary')
+        if not salary or not (salary.get('from') or salary.get('to')):
+            return None
+        return salary.get('from') or None, salary.get('to') or None, salary.get('currency')
+
+
+def _jaccard(left: FrozenSet[str], right: FrozenSet[str]) -> float:
+    """Коэффициент Жаккара двух множеств"""
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+
+class RepostDetector:
+    """LSH-индекс недавних вакансий для поиска перепостов
+
+    Записи хранятся в группах по работодателю и региону. MinHash-подпись
+    названия разбивается на BAND_COUNT полос по BAND_ROWS значений;
+    названия с коэффициентом Жаккара 0.6 совпадают хотя бы в одной
+    полосе с вероятностью выше 99.9%, поэтому поиск кандидатов сводится
+    к нескольким обращениям к словарю. Кандидат считается перепостом,
+    если точный коэффициент Жаккара шинглов названий не ниже
+    DEDUP_MIN_JACCARD и зарплатные вилки совпадают с допуском
+    DEDUP_SALARY_TOLERANCE.
+    """
+
+    def __init__(self, config: Config):
+        self.storage_file = config.DEDUP_FILE
+        self.ttl_seconds = config.DEDUP_TTL_DAYS * 24 * 60 * 60
+        self.min_jaccard = config.DEDUP_MIN_JACCARD
+        self.salary_tolerance = config.DEDUP_SALARY_TOLERANCE
+        # (группа, название, зарплата) -> время
+        self._entries: Dict[EntryKey, float] = {}
+        self._bands: Dict[Tuple[str, int, bytes], Set[EntryKey]] = {}
+        self._load()
+
+    @staticmethod
+    def _split(signature: np.ndarray) -> List[bytes]:
+        """Разбиение подписи на полосы"""
+        return [
+            signature[band * BAND_ROWS:(band + 1) * BAND_ROWS].tobytes()
+            for band in range(BAND_COUNT)
+        ]
+
+    def _load(self):
+        """Загрузка записей с диска"""
+        try:
+            if self.storage_file.exists():
+                with open(self.storage_file, 'rb') as f:
+                    data = codec.loads(f.read())
+                now = time.time()
+                for item in data:
+                    # Записи старых форматов с SimHash-отпечатком пропускаем
+                    if len(item) != 4 or not isinstance(item[1], str):
+                        continue
+                    group, name, seen_at, salary = item
+                    if now - seen_at <= self.ttl_seconds:
+                        self._insert((group, name, tuple(salary) if salary else None), seen_at)
+                logger.info("Загружено %s отпечатков вакансий", len(self._entries))
+        except Exception as e:
+            logger.error("Ошибка загрузки отпечатков вакансий: %s", e)
+
+    def save(self):
+        """Сохранение записей на диск"""
+        try:
+            data = [
+                [group, name, seen_at, salary]
+                for (group, name, salary), seen_at in self._entries.items()
+            ]
+            with open(self.storage_file, 'wb') as f:
+                f.write(codec.dumps(data))
+        except Exception as e:
+            logger.error("Ошибка сохранения отпечатков вакансий: %s", e)
+
+    def _band_keys(self, group: str, shingles: FrozenSet[str]) -> List[Tuple[str, int, bytes]]:
+        """Ключи LSH-корзин названия в группе"""
+        signature = VacancyFingerprint.minhash(shingles)
+        return [(group, band, key) for band, key in enumerate(self._split(signature))]
+
+    def _insert(self, key: EntryKey, seen_at: float):
+        """Добавление записи в индекс"""
+        group, name, _ = key
+        self._entries[key] = seen_at
+        for band_key in self._band_keys(group, VacancyFingerprint.shingles(name)):
+            self._bands.setdefault(band_key, set()).add(key)
+
+    def _remove(self, key: EntryKey):
+        """Удаление записи из индекса"""
+        group, name, _ = key
+        self._entries.pop(key, None)
+        for band_key in self._band_keys(group, VacancyFingerprint.shingles(name)):
+            bucket = self._bands.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._bands[band_key]
+
+    def _close(self, left: Optional[int], right: Optional[int]) -> bool:
+        """Совпадение границы вилки с допуском"""
+        if left is None or right is None:
+            return left is None and right is None
+        return abs(left - right) <= self.salary_tolerance * max(left, right)
+
+    def salary_matches(self, left: Salary, right: Salary) -> bool:
+        """Совпадение зарплатных вилок с допуском"""
+        if left is None or right is None:
+            return left is None and right is None
+        return (
+            left[2] == right[2]
+            and self._close(left[0], right[0])
+            and self._close(left[1], right[1])
+        )
+
+    def find_similar(self, group: str, name: str, salary: Salary) -> Optional[EntryKey]:
+        """Поиск подтверждённой похожей записи в группе"""
+        shingles = VacancyFingerprint.shingles(name)
+        checked = set()
+        for band_key in self._band_keys(group, shingles):
+            for candidate in self._bands.get(band_key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                _, candidate_name, candidate_salary = candidate
+                if not self.salary_matches(salary, candidate_salary):
+                    continue
+                candidate_shingles = VacancyFingerprint.shingles(candidate_name)
+                if _jaccard(shingles, candidate_shingles) >= self.min_jaccard:
+                    return candidate
+        return None
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """Удаление записей старше TTL"""
+        now = time.time() if now is None else now
+        # Словарь упорядочен по времени вставки, а повторно увиденные
+        # записи переносятся в конец, поэтому старые лежат в начале
+        expired = []
+        for key, seen_at in self._entries.items():
+            if now - seen_at <= self.ttl_seconds:
+                break
+            expired.append(key)
+
+        for key in expired:
+            self._remove(key)
+        return len(expired)
+
+    def check_and_add(self, vacancy: Dict, now: Optional[float] = None) -> bool:
+        """Проверка на перепост; возвращает True, если вакансия уже встречалась"""
+        now = time.time() if now is None else now
+        group = VacancyFingerprint.group_key(vacancy)
+        name = VacancyFingerprint.normalize_name(vacancy.get('name') or '')
+        salary = VacancyFingerprint.salary(vacancy)
+        similar = self.find_similar(group, name, salary)
+
+        if similar is not None:
+            # Обновляем время, чтобы регулярно перепостируемая вакансия
+            # не «протухала» в индексе
+            del self._entries[similar]
+            self._entries[similar] = now
+            return True
+
+        self._insert((group, name, salary), now)
+        return False
+
+    def clear(self):
+        """Очистка индекса"""
+        self._entries.clear()
+        self._bands.clear()
+        self.save()
+
+    def count(self) -> int:
+        """Количество записей в индексе"""
+        return len(self._entries)
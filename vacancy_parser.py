@@ -1,86 +1,277 @@
-import json
+import bisect
+import hashlib
+import heapq
 import logging
-from typing import Dict, List, Set
+import mmap
+import os
+import time
+from array import array
+from collections import OrderedDict
+from html import escape
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
 import requests
 from config import Config
+from hh_capture import CaptureRecorder, CaptureReplayer
+from json_codec import codec
+from query_planner import PlannedQuery, QueryPlanner
+from vacancy_dedup import RepostDetector
+from vacancy_ranker import VacancyRanker
+from vacancy_stats import VacancyAnalytics
 
 logger = logging.getLogger(__name__)
 
 
 class VacancyStorage:
-    """Хранилище просмотренных вакансий"""
+    """Хранилище просмотренных вакансий
+
+    Основная часть ID лежит на диске в виде отсортированного массива
+    64-битных чисел, который отображается в память (mmap) и проверяется
+    бинарным поиском. Новые ID копятся в небольшом дельта-множестве,
+    дописываются в журнал и периодически вливаются в основной индекс.
+    """
     def __init__(self, config: Config):
-        self.storage_file = config.SEEN_VACANCIES_FILE
-        self._seen_ids: Set[str] = self._load()
+        self.legacy_file = config.SEEN_VACANCIES_FILE
+        self.index_file = config.SEEN_INDEX_FILE
+        self.delta_file = config.SEEN_DELTA_FILE
+        self.merge_threshold = config.SEEN_DELTA_MERGE_THRESHOLD
+        self._mmap: Optional[mmap.mmap] = None
+        self._index: Sequence[int] = ()
+        self._delta: Set[int] = set()
+        self._unsaved: List[int] = []
+        self._load()
 
-    def _load(self) -> Set[str]:
-        """Загрузка ID просмотренных вакансий"""
+    @staticmethod
+    def _to_key(vacancy_id: str) -> int:
+        """Преобразование ID вакансии в 64-битный ключ"""
+        if vacancy_id.isdigit() and int(vacancy_id) < 1 << 64:
+            return int(vacancy_id)
+        digest = hashlib.blake2b(vacancy_id.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big')
+
+    def _load(self):
+        """Открытие индекса и загрузка журнала новых ID"""
         try:
-            if self.storage_file.exists():
-                with open(self.storage_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    logger.info(f"Загружено {len(data)} просмотренных вакансий")
-                    return set(data)
+            self._open_index()
+            self._delta = set(self._read_delta())
+            if not self.index_file.exists() and self.legacy_file.exists():
+                self._migrate_legacy()
+            logger.info("Загружено %s просмотренных вакансий", self.count())
         except Exception as e:
-            logger.error(f"Ошибка загрузки seen_vacancies: {e}")
-        return set()
+            logger.error("Ошибка загрузки seen_vacancies: %s", e)
+
+    def _open_index(self):
+        """Отображение основного индекса в память"""
+        self._close_index()
+        if not self.index_file.exists() or self.index_file.stat().st_size == 0:
+            return
+        with open(self.index_file, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index = memoryview(self._mmap).cast('Q')
+
+    def _close_index(self):
+        """Освобождение отображения индекса"""
+        if isinstance(self._index, memoryview):
+            self._index.release()
+        self._index = ()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _read_delta(self) -> array:
+        """Чтение журнала новых ID"""
+        ids = array('Q')
+        if self.delta_file.exists():
+            data = self.delta_file.read_bytes()
+            tail = len(data) % ids.itemsize
+            if tail:
+                # Недописанный хвост после аварийного завершения отрезаем и
+                # в файле, иначе следующие записи журнала сместятся
+                logger.warning("Отброшен недописанный хвост журнала: %s байт", tail)
+                os.truncate(self.delta_file, len(data) - tail)
+            ids.frombytes(data[:len(data) - tail])
+        return ids
+
+    def _migrate_legacy(self):
+        """Перенос истории из старого seen_vacancies.json"""
+        with open(self.legacy_file, 'rb') as f:
+            data = codec.loads(f.read())
+        for vacancy_id in data:
+            key = self._to_key(str(vacancy_id))
+            if not self._index_contains(key):
+                self._delta.add(key)
+        self.merge()
+        logger.info("История из %s перенесена в индекс (%s ID)", self.legacy_file.name, len(data))
+
+    def _index_contains(self, key: int) -> bool:
+        """Бинарный поиск по основному индексу"""
+        i = bisect.bisect_left(self._index, key)
+        return i < len(self._index) and self._index[i] == key
 
     def save(self):
-        """Сохранение ID просмотренных вакансий"""
+        """Сохранение новых ID в журнал"""
         try:
-            with open(self.storage_file, 'w', encoding='utf-8') as f:
-                json.dump(list(self._seen_ids), f, ensure_ascii=False, indent=2)
+            if self._unsaved:
+                with open(self.delta_file, 'ab') as f:
+                    f.write(array('Q', self._unsaved).tobytes())
+                self._unsaved = []
+            if len(self._delta) >= self.merge_threshold:
+                self.merge()
         except Exception as e:
-            logger.error(f"Ошибка сохранения seen_vacancies: {e}")
+            logger.error("Ошибка сохранения seen_vacancies: %s", e)
+
+    def merge(self):
+        """Слияние журнала с основным индексом"""
+        tmp_file = self.index_file.with_suffix('.tmp')
+        chunk = array('Q')
+        with open(tmp_file, 'wb') as f:
+            for key in heapq.merge(self._index, sorted(self._delta)):
+                chunk.append(key)
+                if len(chunk) >= 65536:
+                    chunk.tofile(f)
+                    chunk = array('Q')
+            chunk.tofile(f)
+
+        self._close_index()
+        os.replace(tmp_file, self.index_file)
+        self.delta_file.unlink(missing_ok=True)
+        self._delta.clear()
+        self._unsaved = []
+        self._open_index()
+        logger.info("Индекс просмотренных вакансий обновлён: %s ID", len(self._index))
 
     def add(self, vacancy_id: str) -> bool:
         """Добавление ID вакансии"""
-        if vacancy_id not in self._seen_ids:
-            self._seen_ids.add(vacancy_id)
-            return True
-        return False
+        key = self._to_key(vacancy_id)
+        if key in self._delta or self._index_contains(key):
+            return False
+        self._delta.add(key)
+        self._unsaved.append(key)
+        return True
 
     def contains(self, vacancy_id: str) -> bool:
         """Проверка наличия ID в хранилище"""
-        return vacancy_id in self._seen_ids
+        key = self._to_key(vacancy_id)
+        return key in self._delta or self._index_contains(key)
 
     def clear(self):
         """Очистка хранилища"""
-        self._seen_ids.clear()
-        self.save()
+        self._close_index()
+        self._delta.clear()
+        self._unsaved = []
+        for path in (self.index_file, self.delta_file, self.legacy_file):
+            path.unlink(missing_ok=True)
         logger.info("Хранилище вакансий очищено")
 
     def count(self) -> int:
         """Количество просмотренных вакансий"""
-        return len(self._seen_ids)
+        return len(self._index) + len(self._delta)
+
+
+class VacancyBacklog:
+    """Отложенные вакансии: уже отмечены просмотренными, но не отправлены
+
+    Сюда попадают вакансии, не вошедшие в top_k, и вакансии с оценкой
+    ниже порога, ожидающие переоценки. Их ID уже есть в VacancyStorage,
+    и повторно hh.ru их не вернёт, поэтому очередь сохраняется на диск
+    при каждом изменении и переживает аварийное завершение и остановку
+    парсера.
+    """
+
+    def __init__(self, config: Config):
+        self.backlog_file = config.BACKLOG_FILE
+        self.vacancies: List[Dict] = []
+        # ID вакансии -> число проведённых переоценок
+        self.rank_attempts: Dict[str, int] = {}
+        self._load()
+
+    def _load(self):
+        """Загрузка очереди"""
+        try:
+            if self.backlog_file.exists():
+                with open(self.backlog_file, 'rb') as f:
+                    data = codec.loads(f.read())
+                self.vacancies = data.get('vacancies', [])
+                self.rank_attempts = data.get('rank_attempts', {})
+                logger.info("Загружено %s отложенных вакансий", len(self.vacancies))
+        except Exception as e:
+            logger.error("Ошибка загрузки отложенных вакансий: %s", e)
+
+    def save(self):
+        """Сохранение очереди"""
+        try:
+            with open(self.backlog_file, 'wb') as f:
+                f.write(codec.dumps({
+                    'vacancies': self.vacancies,
+                    'rank_attempts': self.rank_attempts,
+                }))
+        except Exception as e:
+            logger.error("Ошибка сохранения отложенных вакансий: %s", e)
+
+    def update(self, vacancies: List[Dict], rank_attempts: Dict[str, int]):
+        """Замена очереди с сохранением"""
+        self.vacancies = vacancies
+        self.rank_attempts = rank_attempts
+        self.save()
+
+    def clear(self):
+        """Очистка очереди"""
+        self.update([], {})
 
 
 class VacancyFormatter:
-    """Форматирование вакансий для отправки"""
-    @staticmethod
-    def format_vacancy(vacancy: Dict) -> str:
-        """Форматирование сообщения о вакансии"""
-        name = vacancy.get('name', 'Без названия')
-        employer = vacancy.get('employer', {}).get('name', 'Неизвестно')
-        area = vacancy.get('area', {}).get('name', 'Не указан')
-        url = vacancy.get('alternate_url', '')
+    """Форматирование вакансий для отправки
 
-        salary_info = VacancyFormatter._format_salary(vacancy.get('salary'))
-        experience = VacancyFormatter._format_experience(vacancy.get('experience'))
-        employment = VacancyFormatter._format_employment(vacancy.get('employment'))
+    Готовые сообщения кэшируются по ID вакансии и версии шаблона (LRU),
+    поэтому одна вакансия, подходящая под несколько подписок, рендерится
+    один раз. TEMPLATE_VERSION нужно увеличивать при изменении шаблона.
+    """
 
-        message = f"""<b>Новая вакансия!</b>
+    TEMPLATE_VERSION = 1
 
-<b>{name}</b>
-Компания: {employer}
-Город: {area}
-Зарплата: {salary_info}
-Опыт: {experience}
-Занятость: {employment}
+    def __init__(self, cache_size: int = 1000):
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
 
-🔗 <a href="{url}">Открыть вакансию</a>
-"""
-        return message.strip()
+    def format_vacancy(self, vacancy: Dict) -> str:
+        """Форматирование сообщения о вакансии"""
+        vacancy_id = vacancy.get('id')
+        if vacancy_id is None:
+            return self.render(vacancy)
+
+        key = (str(vacancy_id), self.TEMPLATE_VERSION)
+        message = self._cache.get(key)
+        if message is not None:
+            self._cache.move_to_end(key)
+            return message
+
+        message = self.render(vacancy)
+        self._cache[key] = message
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return message
+
+    @classmethod
+    def render(cls, vacancy: Dict) -> str:
+        """Рендеринг сообщения без кэша"""
+        # Шаблон — f-строка: Python компилирует её один раз вместе с модулем
+        name = escape(vacancy.get('name') or 'Без названия')
+        employer = escape((vacancy.get('employer') or {}).get('name') or 'Неизвестно')
+        area = escape((vacancy.get('area') or {}).get('name') or 'Не указан')
+        url = escape(vacancy.get('alternate_url') or '')
+        salary = cls._format_salary(vacancy.get('salary'))
+        experience = escape(cls._format_experience(vacancy.get('experience')))
+        employment = escape(cls._format_employment(vacancy.get('employment')))
+
+        return (
+            f"<b>Новая вакансия!</b>\n\n"
+            f"<b>{name}</b>\n"
+            f"Компания: {employer}\n"
+            f"Город: {area}\n"
+            f"Зарплата: {salary}\n"
+            f"Опыт: {experience}\n"
+            f"Занятость: {employment}\n\n"
+            f"🔗 <a href=\"{url}\">Открыть вакансию</a>"
+        )
 
     @staticmethod
     def _format_salary(salary: Dict) -> str:
@@ -106,14 +297,14 @@ class VacancyFormatter:
         """Форматирование опыта"""
         if not experience:
             return "Не указан"
-        return experience.get('name', 'Не указан')
+        return experience.get('name') or 'Не указан'
 
     @staticmethod
     def _format_employment(employment: Dict) -> str:
         """Форматирование типа занятости"""
         if not employment:
             return "Не указана"
-        return employment.get('name', 'Не указана')
+        return employment.get('name') or 'Не указана'
 
 
 class VacancyParser:
@@ -122,36 +313,116 @@ class VacancyParser:
     def __init__(self, config: Config):
         self.config = config
         self.storage = VacancyStorage(config)
-        self.formatter = VacancyFormatter()
+        self.backlog = VacancyBacklog(config)
+        self.reposts = RepostDetector(config)
+        self.formatter = VacancyFormatter(config.RENDER_CACHE_SIZE)
+        self.ranker = VacancyRanker(config)
+        self.analytics = VacancyAnalytics(config)
+        self.planner = QueryPlanner()
+        self.recorder: Optional[CaptureRecorder] = None
+        self.replayer: Optional[CaptureReplayer] = None
+
+        if config.capture_mode == 'record':
+            self.recorder = CaptureRecorder(config.HH_CAPTURE_FILE)
+            logger.info("Ответы hh.ru записываются в %s", config.HH_CAPTURE_FILE)
+        elif config.capture_mode == 'replay':
+            self.replayer = CaptureReplayer(
+                config.HH_CAPTURE_FILE,
+                speed=config.replay_speed,
+                scale=config.replay_scale
+            )
+            logger.info("Ответы hh.ru воспроизводятся из %s", config.HH_CAPTURE_FILE)
 
     def fetch_vacancies(self, filters: Dict) -> List[Dict]:
         """Получение вакансий с hh.ru API"""
+        return next(self._iter_pages(filters, 1), [])
+
+    def _iter_pages(self, filters: Dict, max_pages: int) -> Iterator[List[Dict]]:
+        """Постраничное получение выдачи, не более max_pages страниц"""
         try:
             params = self._build_params(filters)
-
-            response = requests.get(
-                self.config.HH_API_URL,
-                params=params,
-                timeout=self.config.HH_API_TIMEOUT,
-                headers={'User-Agent': 'VacancyBot/1.0'}
-            )
-            response.raise_for_status()
-
-            data = response.json()
-            vacancies = data.get('items', [])
-
-            logger.info(f"Получено {len(vacancies)} вакансий с hh.ru")
-            return vacancies
+            for page in range(max_pages):
+                params['page'] = page
+                response = self._request(params)
+                response.raise_for_status()
+
+                data = codec.decode_search(response.content)
+                vacancies = data.get('items', [])
+                logger.info("Получено %s вакансий с hh.ru", len(vacancies))
+                yield vacancies
+                if page + 1 >= data.get('pages', 1):
+                    return
 
         except requests.exceptions.Timeout:
             logger.error("Таймаут при запросе к hh.ru API")
-            return []
         except requests.exceptions.RequestException as e:
-            logger.error(f"Ошибка при запросе к hh.ru API: {e}")
-            return []
+            logger.error("Ошибка при запросе к hh.ru API: %s", e)
         except Exception as e:
-            logger.error(f"Неожиданная ошибка при парсинге: {e}")
-            return []
+            logger.error("Неожиданная ошибка при парсинге: %s", e)
+
+    def fetch_for_subscriptions(self, subscriptions: List[Dict]) -> List[List[Dict]]:
+        """Получение вакансий для нескольких подписок
+
+        Похожие подписки объединяются планировщиком в один запрос,
+        поэтому число запросов к hh.ru зависит от числа различных
+        поисковых запросов, а не от числа подписок.
+        """
+        result: List[List[Dict]] = [[] for _ in subscriptions]
+        for query in self.planner.plan(subscriptions):
+            if len(query.subscriptions) == 1:
+                result[query.subscriptions[0]] = self.fetch_vacancies(query.filters)
+                continue
+
+            for index, routed in self._fetch_merged(query, subscriptions).items():
+                result[index] = routed
+        return result
+
+    def _fetch_merged(self, query: PlannedQuery, subscriptions: List[Dict]) -> Dict[int, List[Dict]]:
+        """Постраничное чтение объединённого запроса
+
+        Выдача упорядочена по дате публикации и читается, пока каждая
+        подписка группы не наберёт страницу своей собственной выдачи.
+        Чтение прекращается раньше, если на странице встретилась уже
+        просмотренная вакансия: дальше идут только более старые, а они
+        разобраны в прошлых проверках. MERGED_QUERY_MAX_PAGES ограничивает
+        число запросов на первой проверке, когда просмотренных ещё нет.
+        """
+        per_page = self.config.MAX_VACANCIES_PER_PAGE
+        routed: Dict[int, List[Dict]] = {index: [] for index in query.subscriptions}
+        filters = dict(query.filters, order_by='publication_time')
+
+        for vacancies in self._iter_pages(filters, self.config.MERGED_QUERY_MAX_PAGES):
+            for index, matched in self.planner.route(query, vacancies, subscriptions).items():
+                routed[index].extend(matched[:per_page - len(routed[index])])
+
+            if all(len(matched) >= per_page for matched in routed.values()):
+                break
+            if any(self.storage.contains(str(v.get('id'))) for v in vacancies):
+                break
+
+        return routed
+
+    def _request(self, params: Dict):
+        """Запрос к hh.ru API (или к записи в режиме replay)"""
+        if self.replayer:
+            return self.replayer.get(self.config.HH_API_URL, params)
+
+        started = time.perf_counter()
+        response = requests.get(
+            self.config.HH_API_URL,
+            params=params,
+            timeout=self.config.HH_API_TIMEOUT,
+            headers={'User-Agent': 'VacancyBot/1.0'}
+        )
+        if self.recorder:
+            self.recorder.record(
+                self.config.HH_API_URL,
+                params,
+                response.status_code,
+                time.perf_counter() - started,
+                response.content
+            )
+        return response
 
     def _build_params(self, filters: Dict) -> Dict:
         """Построение параметров запроса"""
@@ -163,32 +434,61 @@ class VacancyParser:
         }
 
         if filters.get('experience'):
+            # Список значений передаётся повторяющимся параметром experience
             params['experience'] = filters['experience']
 
         if filters.get('salary'):
             params['salary'] = filters['salary']
             params['only_with_salary'] = True
 
+        if filters.get('order_by'):
+            params['order_by'] = filters['order_by']
+
         return params
 
-    def filter_new_vacancies(self, vacancies: List[Dict]) -> List[Dict]:
-        """Фильтрация новых вакансий"""
+    def filter_new_vacancies(self, vacancies: List[Dict], filters: Optional[Dict] = None) -> List[Dict]:
+        """Фильтрация новых вакансий
+
+        Если переданы filters, новые вакансии учитываются в статистике запроса.
+        """
         new_vacancies = []
+        reposts = 0
+        self.reposts.evict_expired()
 
         for vacancy in vacancies:
             vacancy_id = str(vacancy.get('id'))
 
             if vacancy_id and self.storage.add(vacancy_id):
+                if self.reposts.check_and_add(vacancy):
+                    reposts += 1
+                    continue
                 new_vacancies.append(vacancy)
 
-        if new_vacancies:
+        if new_vacancies or reposts:
             self.storage.save()
-            logger.info(f"Найдено {len(new_vacancies)} новых вакансий")
+            self.reposts.save()
+
+        if filters and filters.get('position') and new_vacancies:
+            self.analytics.record(filters, new_vacancies)
+            self.analytics.save()
+
+        if reposts:
+            logger.info("Пропущено %s перепостов", reposts)
+        if new_vacancies:
+            logger.info("Найдено %s новых вакансий", len(new_vacancies))
         else:
             logger.info("Новых вакансий не найдено")
 
         return new_vacancies
 
+    def rank_vacancies(self, vacancies: List[Dict],
+                       subscriptions: List[Dict]) -> List[Tuple[List[Dict], List[Dict], List[Dict]]]:
+        """Отбор самых релевантных вакансий для каждой подписки
+
+        Возвращает для каждой подписки (к отправке, остаток, ниже порога).
+        """
+        return self.ranker.rank(vacancies, subscriptions)
+
     def format_vacancy(self, vacancy: Dict) -> str:
         """Форматирование вакансии"""
         return self.formatter.format_vacancy(vacancy)
@@ -196,9 +496,16 @@ class VacancyParser:
     def get_statistics(self) -> Dict:
         """Получение статистики парсера"""
         return {
-            'seen_count': self.storage.count()
+            'seen_count': self.storage.count(),
+            'fingerprint_count': self.reposts.count()
         }
 
+    def get_query_stats(self, filters: Dict) -> Optional[Dict]:
+        """Получение рыночной статистики по запросу"""
+        return self.analytics.get_summary(filters)
+
     def clear_history(self):
         """Очистка истории просмотренных вакансий"""
-        self.storage.clear()
\ No newline at end of file
+        self.storage.clear()
+        self.backlog.clear()
+        self.reposts.clear()
\ No newline at end of file
@@ -0,0 +1,134 @@
+import logging
+import re
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_HIGHLIGHT_RE = re.compile(r"</?highlighttext>")
+
+
+class VacancyRanker:
+    """Ранжирование вакансий по релевантности запросам подписок (TF-IDF)"""
+
+    def __init__(self, config: Config):
+        self.config = config
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Разбиение текста на токены"""
+        return _TOKEN_RE.findall(text.lower().replace('ё', 'е'))
+
+    @staticmethod
+    def vacancy_text(vacancy: Dict) -> str:
+        """Текст вакансии для скоринга: название и сниппет"""
+        snippet = vacancy.get('snippet') or {}
+        parts = [
+            vacancy.get('name') or '',
+            snippet.get('requirement') or '',
+            snippet.get('responsibility') or '',
+        ]
+        return _HIGHLIGHT_RE.sub('', ' '.join(parts))
+
+    def _build_matrix(self, documents: Sequence[List[str]],
+                      vocabulary: Dict[str, int]) -> sparse.csr_matrix:
+        """Построение разреженной матрицы частот термов"""
+        indptr = [0]
+        indices = []
+        for tokens in documents:
+            for token in tokens:
+                column = vocabulary.get(token)
+                if column is not None:
+                    indices.append(column)
+            indptr.append(len(indices))
+
+        data = np.ones(len(indices), dtype=np.float32)
+        matrix = sparse.csr_matrix(
+            (data, np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int32)),
+            shape=(len(documents), len(vocabulary))
+        )
+        # Повторы одного терма складываются в одну ячейку
+        matrix.sum_duplicates()
+        return matrix
+
+    @staticmethod
+    def _l2_normalize(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+        """Нормировка строк матрицы по L2"""
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix)
+
+    def score(self, vacancies: List[Dict], queries: List[str]) -> np.ndarray:
+        """Косинусная близость всех вакансий ко всем запросам
+
+        Возвращает матрицу размером (число запросов) x (число вакансий).
+        """
+        documents = [self.tokenize(self.vacancy_text(v)) for v in vacancies]
+        query_tokens = [self.tokenize(q) for q in queries]
+
+        vocabulary: Dict[str, int] = {}
+        for tokens in documents:
+            for token in tokens:
+                vocabulary.setdefault(token, len(vocabulary))
+
+        if not vocabulary:
+            return np.zeros((len(queries), len(vacancies)), dtype=np.float32)
+
+        doc_tf = self._build_matrix(documents, vocabulary)
+        query_tf = self._build_matrix(query_tokens, vocabulary)
+
+        # Сглаженный IDF по текущей выборке вакансий
+        doc_freq = np.bincount(doc_tf.indices, minlength=len(vocabulary))
+        idf = np.log((1 + len(documents)) / (1 + doc_freq)) + 1.0
+        idf_diag = sparse.diags(idf.astype(np.float32))
+
+        doc_vectors = self._l2_normalize(doc_tf @ idf_diag)
+        query_vectors = self._l2_normalize(query_tf @ idf_diag)
+
+        return (query_vectors @ doc_vectors.T).toarray()
+
+    def rank(self, vacancies: List[Dict],
+             subscriptions: List[Dict]) -> List[Tuple[List[Dict], List[Dict], List[Dict]]]:
+        """Отбор и сортировка вакансий для каждой подписки
+
+        Для каждой подписки возвращает тройку (к отправке, остаток, ниже
+        порога). Вакансии с оценкой не ниже min_relevance сортируются по
+        убыванию релевантности и делятся по top_k; остаток можно отправить
+        в следующих циклах. Подписка без слов в запросе не ранжируется —
+        к отправке уходят все вакансии в исходном порядке.
+        """
+        if not vacancies or not subscriptions:
+            return [([], [], []) for _ in subscriptions]
+
+        queries = [s.get('position') or '' for s in subscriptions]
+        scores = self.score(vacancies, queries)
+
+        thresholds = np.array([
+            s.get('min_relevance', self.config.RELEVANCE_MIN_SCORE)
+            for s in subscriptions
+        ], dtype=np.float32)
+        top_k = [s.get('top_k', self.config.RELEVANCE_TOP_K) for s in subscriptions]
+
+        # Отсечённые по порогу вакансии уходят в конец сортировки
+        masked = np.where(scores >= thresholds[:, None], scores, -np.inf)
+        order = np.argsort(-masked, axis=1, kind='stable')
+        passed = np.isfinite(masked).sum(axis=1)
+
+        result = []
+        for row, limit in enumerate(top_k):
+            if not self.tokenize(queries[row]):
+                result.append((list(vacancies), [], []))
+                continue
+
+            count = int(passed[row])
+            ranked = [vacancies[i] for i in order[row, :count]]
+            rejected = [vacancies[i] for i in order[row, count:]]
+            result.append((ranked[:limit], ranked[limit:], rejected))
+            logger.info(
+                "Подписка «%s»: отобрано %s из %s вакансий, ниже порога %s",
+                queries[row], min(count, limit), len(vacancies), len(rejected)
+            )
+        return result
@@ -0,0 +1,302 @@
+import logging
+import math
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+from config import Config
+from json_codec import codec
+
+logger = logging.getLogger(__name__)
+
+
+class TDigest:
+    """Упрощённый merging t-digest для потоковой оценки квантилей
+
+    Хранит не больше ~compression центроидов независимо от числа значений,
+    поэтому дайджест компактно сериализуется и сливается с другими.
+    """
+
+    def __init__(self, compression: int = 100):
+        self.compression = compression
+        self._centroids: List[List[float]] = []
+        self._buffer: List[float] = []
+        self._count = 0.0
+        self._min: Optional[float] = None
+        self._max: Optional[float] = None
+
+    @property
+    def count(self) -> int:
+        """Количество добавленных значений"""
+        return int(self._count + len(self._buffer))
+
+    def add(self, value: float, weight: float = 1.0):
+        """Добавление значения"""
+        self._min = value if self._min is None else min(self._min, value)
+        self._max = value if self._max is None else max(self._max, value)
+        if weight == 1.0:
+            self._buffer.append(value)
+        else:
+            self._centroids.append([value, weight])
+            self._count += weight
+        if len(self._buffer) >= self.compression * 5:
+            self._compress()
+
+    def merge(self, other: 'TDigest'):
+        """Слияние с другим дайджестом"""
+        other._compress()
+        for mean, weight in other._centroids:
+            self.add(mean, weight)
+        if other._min is not None:
+            self._min = min(self._min, other._min)
+            self._max = max(self._max, other._max)
+        self._compress()
+
+    def _compress(self):
+        """Слияние буфера с центроидами"""
+        if not self._buffer and len(self._centroids) <= self.compression:
+            return
+
+        points = self._centroids + [[value, 1.0] for value in self._buffer]
+        self._count += len(self._buffer)
+        self._buffer = []
+        points.sort(key=lambda c: c[0])
+
+        total = self._count
+        merged = [list(points[0])]
+        q_left = 0.0
+        q_limit = self._q_limit(q_left)
+        for mean, weight in points[1:]:
+            last = merged[-1]
+            if q_left + (last[1] + weight) / total <= q_limit:
+                new_weight = last[1] + weight
+                last[0] += (mean - last[0]) * weight / new_weight
+                last[1] = new_weight
+            else:
+                q_left += last[1] / total
+                q_limit = self._q_limit(q_left)
+                merged.append([mean, weight])
+        self._centroids = merged
+
+    def _q_limit(self, q: float) -> float:
+        """Правая граница центроида по масштабной функции k1"""
+        k = self.compression / (2 * math.pi) * math.asin(2 * q - 1) + 1
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Оценка квантиля q (0..1)"""
+        self._compress()
+        if not self._centroids:
+            return None
+        if len(self._centroids) == 1:
+            return self._centroids[0][0]
+
+        target = q * self._count
+        cumulative = 0.0
+        for i, (mean, weight) in enumerate(self._centroids):
+            center = cumulative + weight / 2
+            if target <= center:
+                if i == 0:
+                    return self._interpolate(self._min, mean, 0.0, center, target)
+                prev_mean, prev_weight = self._centroids[i - 1]
+                prev_center = cumulative - prev_weight / 2
+                return self._interpolate(prev_mean, mean, prev_center, center, target)
+            cumulative += weight
+
+        last_mean, last_weight = self._centroids[-1]
+        return self._interpolate(
+            last_mean, self._max, self._count - last_weight / 2, self._count, target
+        )
+
+    @staticmethod
+    def _interpolate(left: float, right: float, left_pos: float,
+                     right_pos: float, target: float) -> float:
+        """Линейная интерполяция между соседними центроидами"""
+        if right_pos <= left_pos:
+            return right
+        share = (target - left_pos) / (right_pos - left_pos)
+        return left + (right - left) * min(max(share, 0.0), 1.0)
+
+    def to_dict(self) -> Dict:
+        """Компактная сериализация"""
+        self._compress()
+        return {
+            'c': [[round(mean, 1), weight] for mean, weight in self._centroids],
+            'min': self._min,
+            'max': self._max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, compression: int = 100) -> 'TDigest':
+        """Восстановление из сериализованного вида"""
+        digest = cls(compression)
+        digest._centroids = [list(c) for c in data.get('c', [])]
+        digest._count = sum(weight for _, weight in digest._centroids)
+        digest._min = data.get('min')
+        digest._max = data.get('max')
+        return digest
+
+
+class QueryStats:
+    """Потоковые агрегаты по одному поисковому запросу"""
+
+    def __init__(self, history_days: int, compression: int):
+        self.history_days = history_days
+        self.total = 0
+        self.with_salary = 0
+        self.daily: Dict[str, int] = {}
+        self.salary = TDigest(compression)
+
+    def add(self, vacancy: Dict, day: date):
+        """Учёт новой вакансии"""
+        key = day.isoformat()
+        self.total += 1
+        self.daily[key] = self.daily.get(key, 0) + 1
+
+        value = VacancyAnalytics.salary_value(vacancy.get('salary'))
+        if value is not None:
+            self.with_salary += 1
+            self.salary.add(value)
+
+    def trim(self, today: date):
+        """Удаление дневных счётчиков старше окна истории"""
+        border = (today - timedelta(days=self.history_days)).isoformat()
+        for key in [k for k in self.daily if k < border]:
+            del self.daily[key]
+
+    def summary(self, today: date, days: int = 7) -> Dict:
+        """Сводка по запросу
+
+        Среднее в день считается по дням наблюдения, но не более чем
+        за days последних дней.
+        """
+        if self.daily:
+            first_day = date.fromisoformat(min(self.daily))
+            days = max(1, min(days, (today - first_day).days + 1))
+        window = [
+            self.daily.get((today - timedelta(days=i)).isoformat(), 0)
+            for i in range(days)
+        ]
+        return {
+            'total': self.total,
+            'today': window[0],
+            'days': days,
+            'per_day': sum(window) / days,
+            'with_salary': self.with_salary,
+            'p25': self.salary.quantile(0.25),
+            'p50': self.salary.quantile(0.5),
+            'p75': self.salary.quantile(0.75),
+            'p90': self.salary.quantile(0.9),
+        }
+
+    def to_dict(self) -> Dict:
+        """Сериализация"""
+        return {
+            'total': self.total,
+            'with_salary': self.with_salary,
+            'daily': self.daily,
+            'salary': self.salary.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, history_days: int, compression: int) -> 'QueryStats':
+        """Восстановление из сериализованного вида"""
+        stats = cls(history_days, compression)
+        stats.total = data.get('total', 0)
+        stats.with_salary = data.get('with_salary', 0)
+        stats.daily = dict(data.get('daily', {}))
+        stats.salary = TDigest.from_dict(data.get('salary', {}), compression)
+        return stats
+
+
+class VacancyAnalytics:
+    """Инкрементальная аналитика по сохранённым запросам
+
+    Запрос определяется всеми параметрами поиска — текстом, регионом,
+    зарплатой и опытом, — поэтому после смены фильтров статистика
+    собирается заново, а не смешивается с прежней.
+    """
+
+    SALARY_CURRENCIES = ('RUR', 'RUB')
+
+    def __init__(self, config: Config):
+        self.storage_file = config.STATS_FILE
+        self.history_days = config.STATS_HISTORY_DAYS
+        self.compression = config.STATS_DIGEST_COMPRESSION
+        self._queries: Dict[str, QueryStats] = self._load()
+
+    def _load(self) -> Dict[str, QueryStats]:
+        """Загрузка агрегатов"""
+        try:
+            if self.storage_file.exists():
+                with open(self.storage_file, 'rb') as f:
+                    data = codec.loads(f.read())
+                    logger.info("Загружена статистика по %s запросам", len(data))
+                    # Ключи старого формата (только текст запроса) отбрасываем:
+                    # в них смешаны выдачи с разными фильтрами
+                    return {
+                        query: QueryStats.from_dict(item, self.history_days, self.compression)
+                        for query, item in data.items()
+                        if '|' in query
+                    }
+        except Exception as e:
+            logger.error("Ошибка загрузки статистики: %s", e)
+        return {}
+
+    def save(self):
+        """Сохранение агрегатов"""
+        try:
+            data = {query: stats.to_dict() for query, stats in self._queries.items()}
+            with open(self.storage_file, 'wb') as f:
+                f.write(codec.dumps(data))
+        except Exception as e:
+            logger.error("Ошибка сохранения статистики: %s", e)
+
+    @staticmethod
+    def query_key(filters: Dict) -> str:
+        """Нормализованный ключ поиска: текст, регион, зарплата и опыт"""
+        text = ' '.join((filters.get('position') or '').lower().split())
+        experience = filters.get('experience') or []
+        if isinstance(experience, str):
+            experience = [experience]
+        return '|'.join((
+            text,
+            str(filters.get('area_id', 1)),
+            str(filters.get('salary') or ''),
+            ','.join(sorted(experience)),
+        ))
+
+    @classmethod
+    def salary_value(cls, salary: Optional[Dict]) -> Optional[float]:
+        """Точечная оценка зарплаты вакансии в рублях"""
+        if not salary or salary.get('currency', 'RUR') not in cls.SALARY_CURRENCIES:
+            return None
+
+        from_sal = salary.get('from')
+        to_sal = salary.get('to')
+        if from_sal and to_sal:
+            return (from_sal + to_sal) / 2
+        return from_sal or to_sal or None
+
+    def record(self, filters: Dict, vacancies: List[Dict], today: Optional[date] = None):
+        """Учёт новых вакансий по запросу"""
+        today = today or date.today()
+        key = self.query_key(filters)
+        stats = self._queries.get(key)
+        if stats is None:
+            stats = self._queries[key] = QueryStats(self.history_days, self.compression)
+
+        for vacancy in vacancies:
+            stats.add(vacancy, today)
+        stats.trim(today)
+
+    def get_summary(self, filters: Dict, today: Optional[date] = None) -> Optional[Dict]:
+        """Сводка по запросу или None, если данных нет"""
+        stats = self._queries.get(self.query_key(filters))
+        if stats is None:
+            return None
+        return stats.summary(today or date.today())
+
+    def queries(self) -> List[str]:
+        """Список запросов, по которым есть статистика"""
+        return list(self._queries)